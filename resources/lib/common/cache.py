@@ -13,6 +13,10 @@ from resources.lib.common import make_call, IPC_ENDPOINT_CACHE
 class Cache:
     """Cache IPC interface"""
 
+    def get_stats(self):
+        """Get the statistics of the cache usage"""
+        return make_call('get_stats', endpoint=IPC_ENDPOINT_CACHE)
+
     def get(self, bucket, identifier):
         """Get a item from cache bucket"""
         call_args = {
@@ -21,6 +25,18 @@ class Cache:
         }
         return make_call('get', call_args, IPC_ENDPOINT_CACHE)
 
+    def get_many(self, bucket, identifiers):
+        """
+        Get multiple items from cache bucket
+
+        :return: a dict with the data of the identifiers found in cache (the missing identifiers are not included)
+        """
+        call_args = {
+            'bucket': bucket,
+            'identifiers': identifiers
+        }
+        return make_call('get_many', call_args, IPC_ENDPOINT_CACHE)
+
     def add(self, bucket, identifier, data, ttl=None, expires=None, delayed_db_op=False):
         """
         Add or update an item to a cache bucket
@@ -44,6 +60,25 @@ class Cache:
         }
         make_call('add', call_args, IPC_ENDPOINT_CACHE)
 
+    def add_many(self, bucket, entries, ttl=None, expires=None, delayed_db_op=False):
+        """
+        Add or update multiple items to a cache bucket
+
+        :param bucket: bucket where save the data
+        :param entries: a dict with the key identifiers and the data
+        :param ttl: override default expiration (in seconds)
+        :param expires: override default expiration (in timestamp) if specified override also the 'ttl' value
+        :param delayed_db_op: see 'add' method
+        """
+        call_args = {
+            'bucket': bucket,
+            'entries': entries,
+            'ttl': ttl,
+            'expires': expires,
+            'delayed_db_op': delayed_db_op
+        }
+        make_call('add_many', call_args, IPC_ENDPOINT_CACHE)
+
     def delete(self, bucket, identifier, including_suffixes=False):
         """
         Delete an item from cache bucket
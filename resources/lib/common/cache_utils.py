@@ -7,31 +7,94 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import lzma
 import pickle
+import sqlite3 as sql
+import threading
+import zlib
 from functools import wraps
 
 from resources.lib.globals import G
 from resources.lib.utils.logging import LOG
-from .exceptions import CacheMiss
+from .exceptions import CacheMiss, DBSQLiteConnectionError
 
 # Cache buckets (the default_ttl is the variable name in 'global' class)
-CACHE_COMMON = {'name': 'cache_common', 'is_persistent': False, 'default_ttl': 'CACHE_TTL'}
-CACHE_GENRES = {'name': 'cache_genres', 'is_persistent': False, 'default_ttl': 'CACHE_TTL'}
-CACHE_SUPPLEMENTAL = {'name': 'cache_supplemental', 'is_persistent': False, 'default_ttl': 'CACHE_TTL'}
-CACHE_METADATA = {'name': 'cache_metadata', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL'}
-CACHE_INFOLABELS = {'name': 'cache_infolabels', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL'}
-CACHE_ARTINFO = {'name': 'cache_artinfo', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL'}
-CACHE_MANIFESTS = {'name': 'cache_manifests', 'is_persistent': False, 'default_ttl': 'CACHE_TTL'}
-CACHE_BOOKMARKS = {'name': 'cache_bookmarks', 'is_persistent': False, 'default_ttl': 'CACHE_TTL'}
-CACHE_MYLIST = {'name': 'cache_mylist', 'is_persistent': False, 'default_ttl': 'CACHE_MYLIST_TTL'}
-CACHE_SEARCH = {'name': 'cache_search', 'is_persistent': False, 'default_ttl': ''}  # Only customized ttl
+# The memory-cache of each bucket is limited by the max number of entries ('max_entries') and the max
+# approximate size in bytes of the data ('max_size'), the least recently used entries will be evicted,
+# for persistent buckets the evicted data will remain available from the database
+# The 'stale_grace_period' is the time in seconds in which the expired data is kept to be returned immediately
+# to the functions decorated with cache_output(stale_while_revalidate=True), while is refreshed in background
+CACHE_COMMON = {'name': 'cache_common', 'is_persistent': False, 'default_ttl': 'CACHE_TTL',
+                'max_entries': 200, 'max_size': 32 * 1024 * 1024, 'stale_grace_period': 6 * 60 * 60}
+CACHE_GENRES = {'name': 'cache_genres', 'is_persistent': False, 'default_ttl': 'CACHE_TTL',
+                'max_entries': 100, 'max_size': 16 * 1024 * 1024, 'stale_grace_period': 6 * 60 * 60}
+CACHE_SUPPLEMENTAL = {'name': 'cache_supplemental', 'is_persistent': False, 'default_ttl': 'CACHE_TTL',
+                      'max_entries': 50, 'max_size': 8 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_METADATA = {'name': 'cache_metadata', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL',
+                  'max_entries': 200, 'max_size': 32 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_INFOLABELS = {'name': 'cache_infolabels', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL',
+                    'max_entries': 5000, 'max_size': 16 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_ARTINFO = {'name': 'cache_artinfo', 'is_persistent': True, 'default_ttl': 'CACHE_METADATA_TTL',
+                 'max_entries': 5000, 'max_size': 16 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_MANIFESTS = {'name': 'cache_manifests', 'is_persistent': False, 'default_ttl': 'CACHE_TTL',
+                   'max_entries': 20, 'max_size': 8 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_BOOKMARKS = {'name': 'cache_bookmarks', 'is_persistent': False, 'default_ttl': 'CACHE_TTL',
+                   'max_entries': 1000, 'max_size': 2 * 1024 * 1024, 'stale_grace_period': 0}
+CACHE_MYLIST = {'name': 'cache_mylist', 'is_persistent': False, 'default_ttl': 'CACHE_MYLIST_TTL',
+                'max_entries': 50, 'max_size': 16 * 1024 * 1024, 'stale_grace_period': 6 * 60 * 60}
+CACHE_SEARCH = {'name': 'cache_search', 'is_persistent': False, 'default_ttl': '',  # Only customized ttl
+                'max_entries': 50, 'max_size': 16 * 1024 * 1024, 'stale_grace_period': 0}
+# The negative results (e.g. metadata not available), to avoid repeating the requests that will fail again
+CACHE_NEGATIVE = {'name': 'cache_negative', 'is_persistent': False, 'default_ttl': 'CACHE_NEGATIVE_TTL',
+                  'max_entries': 1000, 'max_size': 1024 * 1024, 'stale_grace_period': 0}
 
 # The complete list of buckets (to obtain the list quickly)
 BUCKET_NAMES = ['cache_common', 'cache_genres', 'cache_supplemental', 'cache_metadata', 'cache_infolabels',
-                'cache_artinfo', 'cache_manifests', 'cache_bookmarks', 'cache_mylist', 'cache_search']
+                'cache_artinfo', 'cache_manifests', 'cache_bookmarks', 'cache_mylist', 'cache_search',
+                'cache_negative']
 
 BUCKETS = [CACHE_COMMON, CACHE_GENRES, CACHE_SUPPLEMENTAL, CACHE_METADATA, CACHE_INFOLABELS,
-           CACHE_ARTINFO, CACHE_MANIFESTS, CACHE_BOOKMARKS, CACHE_MYLIST, CACHE_SEARCH]
+           CACHE_ARTINFO, CACHE_MANIFESTS, CACHE_BOOKMARKS, CACHE_MYLIST, CACHE_SEARCH, CACHE_NEGATIVE]
+
+# The buckets with data that not depends on the profile (the identifiers must include the profile language
+# when the data is localized), these are shared between all profiles instead of being allocated by profile
+SHARED_BUCKET_NAMES = ['cache_infolabels', 'cache_artinfo']
+
+# The non-persistent buckets where the memory-cache keeps the objects as they are, instead of the serialized data,
+# so that the service gets the cached objects without deserialize them on each access (the frontend still
+# receives a copy through the IPC). The cached objects are shared, so must be considered read-only,
+# if they need to be modified they must be copied
+LIVE_OBJECT_BUCKET_NAMES = ['cache_common', 'cache_genres', 'cache_supplemental', 'cache_mylist', 'cache_search']
+
+# The non-persistent buckets of the listings data, that are saved at service stop (snapshot) and restored at the next
+# service start, the other non-persistent buckets (e.g. manifests, bookmarks, negative results) are short-lived
+SNAPSHOT_BUCKET_NAMES = ['cache_common', 'cache_genres', 'cache_supplemental', 'cache_mylist', 'cache_search']
+
+# Compression methods of the data saved to the database (the method is saved to each row of the table)
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+# The compression method and level used to save the data of the persistent buckets
+# (to compare the size and the time of the methods see tests/measure_cache_compression.py)
+DB_COMPRESSION = COMPRESSION_ZLIB
+DB_COMPRESSION_LEVEL = 6
+
+
+# The calls of the functions decorated with cache_output currently in progress, the concurrent calls with the same
+# cache identifier (e.g. two skin widgets that load the same list at same time) will wait the result of the first call
+# instead of execute the same requests again (single-flight)
+_IN_FLIGHT_CALLS = {}
+_IN_FLIGHT_CALLS_MUTEX = threading.Lock()
+# Counters of cache_output decorator calls
+CACHE_OUTPUT_STATS = {'coalesced_calls': 0}
+
+
+class _InFlightCall:
+    """A call in progress of a function decorated with cache_output"""
+    def __init__(self):
+        self.done_event = threading.Event()
+        self.output = None
+        self.exception = None
 
 
 # Logic to get the identifier
@@ -44,13 +107,21 @@ BUCKETS = [CACHE_COMMON, CACHE_GENRES, CACHE_SUPPLEMENTAL, CACHE_METADATA, CACHE
 # identify_fallback_arg_index - to change the default fallback arg index (0), where the identifier
 #                               get the value from the func arguments
 # fixed_identifier - note if specified all other params are ignored
+# stale_while_revalidate - if True (only for the service), when the cached data is expired within the grace period
+#                          of the bucket, the stale data will be returned immediately while in background
+#                          will be executed the function to refresh the cached data
+# negative_cache_exceptions - tuple of exception classes, when the function raise one of them, the exception
+#                             is cached in CACHE_NEGATIVE bucket and raised again to the next calls
+#                             (until expiration), without execute the function
 
 def cache_output(bucket, fixed_identifier=None,
                  identify_from_kwarg_name='videoid',
                  identify_append_from_kwarg_name=None,
                  identify_fallback_arg_index=0,
                  ttl=None,
-                 ignore_self_class=False):
+                 ignore_self_class=False,
+                 stale_while_revalidate=False,
+                 negative_cache_exceptions=None):
     """Decorator that ensures caching the output of a function"""
     def caching_decorator(func):
         @wraps(func)
@@ -67,15 +138,109 @@ def cache_output(bucket, fixed_identifier=None,
                 return func(*args, **kwargs)
             _bucket = CACHE_MYLIST if arg_value == 'mylist' else bucket
             try:
+                if stale_while_revalidate and G.IS_SERVICE:
+                    output, is_stale = G.CACHE.get_allow_stale(_bucket, identifier)
+                    if is_stale:
+                        _revalidate_in_background(func, args, kwargs, _bucket, identifier, ttl)
+                    return output
                 return G.CACHE.get(_bucket, identifier)
             except CacheMiss:
-                output = func(*args, **kwargs)
-                G.CACHE.add(_bucket, identifier, output, ttl=ttl)
-                return output
+                pass
+            if not negative_cache_exceptions:
+                return _execute_single_flight(func, args, kwargs, _bucket, identifier, ttl)
+            negative_identifier = f'{_bucket["name"]}_{identifier}'
+            check_negative_result(negative_identifier)
+            try:
+                return _execute_single_flight(func, args, kwargs, _bucket, identifier, ttl)
+            except negative_cache_exceptions as exc:
+                add_negative_result(negative_identifier, exc)
+                raise
         return wrapper
     return caching_decorator
 
 
+def check_negative_result(identifier):
+    """Raise again the exception of a negative result, if it is cached"""
+    try:
+        exc = G.CACHE.get(CACHE_NEGATIVE, identifier)
+    except CacheMiss:
+        return
+    LOG.debug('Negative result cached for the identifier {}', identifier)
+    if exc is not None:
+        raise exc
+
+
+def add_negative_result(identifier, exc=None):
+    """
+    Cache a negative result, until it expires the exception will be raised by check_negative_result
+    (or when the exception is not specified, the identifier will be only found in the CACHE_NEGATIVE bucket)
+    """
+    G.CACHE.add(CACHE_NEGATIVE, identifier, exc)
+
+
+def delete_negative_result(identifier):
+    """Delete a cached negative result"""
+    G.CACHE.delete(CACHE_NEGATIVE, identifier)
+
+
+def _execute_single_flight(func, args, kwargs, bucket, identifier, ttl):
+    """Execute the function and cache the output, or wait for the output of the same call already in progress"""
+    call_key = (bucket['name'], identifier)
+    with _IN_FLIGHT_CALLS_MUTEX:
+        in_flight_call = _IN_FLIGHT_CALLS.get(call_key)
+        is_coalesced = in_flight_call is not None
+        if is_coalesced:
+            CACHE_OUTPUT_STATS['coalesced_calls'] += 1
+        else:
+            in_flight_call = _InFlightCall()
+            _IN_FLIGHT_CALLS[call_key] = in_flight_call
+    if is_coalesced:
+        LOG.debug('Waiting for the output of the call in progress with cache identifier {}', identifier)
+        in_flight_call.done_event.wait()
+        if in_flight_call.exception is not None:
+            raise in_flight_call.exception
+        try:
+            # Get the output from the cache, so that each caller has its own copy of the data
+            # (except for the service with the buckets that keep the objects as they are)
+            return G.CACHE.get(bucket, identifier)
+        except CacheMiss:
+            return in_flight_call.output
+    try:
+        try:
+            # The output could have been added to the cache by a call just completed
+            in_flight_call.output = G.CACHE.get(bucket, identifier)
+        except CacheMiss:
+            in_flight_call.output = func(*args, **kwargs)
+            G.CACHE.add(bucket, identifier, in_flight_call.output, ttl=ttl)
+        return in_flight_call.output
+    except Exception as exc:
+        in_flight_call.exception = exc
+        raise
+    finally:
+        with _IN_FLIGHT_CALLS_MUTEX:
+            del _IN_FLIGHT_CALLS[call_key]
+        in_flight_call.done_event.set()
+
+
+def _revalidate_in_background(func, args, kwargs, bucket, identifier, ttl):
+    """Execute in background the function to refresh the stale cached data"""
+    with _IN_FLIGHT_CALLS_MUTEX:
+        if (bucket['name'], identifier) in _IN_FLIGHT_CALLS:
+            # The data is already being refreshed
+            return
+    LOG.debug('The cached data with identifier {} is stale, refreshing it in background', identifier)
+    threading.Thread(target=_revalidate,
+                     args=(func, args, kwargs, bucket, identifier, ttl),
+                     daemon=True).start()
+
+
+def _revalidate(func, args, kwargs, bucket, identifier, ttl):
+    try:
+        _execute_single_flight(func, args, kwargs, bucket, identifier, ttl)
+    except Exception as exc:  # pylint: disable=broad-except
+        LOG.error('Refreshing of the cached data with identifier {} failed: {}', identifier, exc)
+
+
 def _get_identifier(fixed_identifier, identify_from_kwarg_name,
                     identify_append_from_kwarg_name, identify_fallback_arg_index, args, kwargs):
     """Return the identifier to use with the caching_decorator"""
@@ -103,9 +268,52 @@ def serialize_data(value):
     return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
 
 
+def compress_data(value, compression=DB_COMPRESSION, level=DB_COMPRESSION_LEVEL):
+    """Compress the serialized data, return a tuple with the data and the compression method used"""
+    if compression == COMPRESSION_ZLIB:
+        compressed_value = zlib.compress(value, level)
+    elif compression == COMPRESSION_LZMA:
+        compressed_value = lzma.compress(value, preset=level)
+    else:
+        return value, COMPRESSION_NONE
+    if len(compressed_value) >= len(value):
+        # Not compressible (e.g. very small data)
+        return value, COMPRESSION_NONE
+    return compressed_value, compression
+
+
+def decompress_data(value, compression):
+    """Decompress the serialized data"""
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(value)
+    if compression == COMPRESSION_LZMA:
+        return lzma.decompress(value)
+    return value
+
+
 def deserialize_data(value):
     try:
         return pickle.loads(value)
     except pickle.UnpicklingError as exc:
         LOG.error('It was not possible to deserialize the cache data, try purge cache from expert settings menu')
         raise CacheMiss from exc
+
+
+def handle_connection(func):
+    """A decorator that handle the access to the cache database (for CacheManagement methods)"""
+    # Each thread use its own connection (see CacheManagement.conn), but when the SQLite library is not thread safe
+    # the access to the database must be serialized
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        is_not_thread_safe = not G.IS_SQLITE3_THREADSAFE
+        try:
+            if is_not_thread_safe:
+                args[0].mutex.acquire()
+            return func(*args, **kwargs)
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            raise DBSQLiteConnectionError from exc
+        finally:
+            if is_not_thread_safe:
+                args[0].mutex.release()
+    return wrapper
@@ -7,22 +7,37 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import os
 import pickle
+import socket
+import threading
 from base64 import b64encode, b64decode
+from http.client import HTTPConnection, HTTPException, RemoteDisconnected
 
 import AddonSignals
+import xbmcvfs
 
 from resources.lib.common import exceptions
 from resources.lib.globals import G
 from resources.lib.utils.logging import LOG, measure_exec_time_decorator
+from .device_utils import get_system_platform
 from .misc_utils import run_threaded
 
 IPC_TIMEOUT_SECS = 20
 
+# Errors of a reused keep-alive connection closed by the service before accepting the request
+IPC_RETRY_ERRORS_REUSED_CONN = (RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+# Errors of a new connection refused, e.g. the service has been restarted with a new port
+IPC_RETRY_ERRORS_NEW_CONN = (ConnectionRefusedError,)
+
+# File name of the Unix domain socket for IPC over HTTP (created in the add-on user data folder)
+IPC_SOCKET_FILENAME = 'nf_service.sock'
+
 # IPC over HTTP endpoints
 IPC_ENDPOINT_CACHE = '/netflix_service/cache'
 IPC_ENDPOINT_MSL = '/netflix_service/msl'
 IPC_ENDPOINT_NFSESSION = '/netflix_service/nfsession'
+IPC_ENDPOINT_NFSESSION_BATCH = '/netflix_service/nfsessionbatch'
 IPC_ENDPOINT_NFSESSION_TEST = '/netflix_service/nfsessiontest'
 
 
@@ -95,36 +110,151 @@ def make_call(func_name, data=None, endpoint=IPC_ENDPOINT_NFSESSION):
     return make_addonsignals_call(func_name, data)
 
 
+@measure_exec_time_decorator()
+def make_calls(calls, return_exceptions=False):
+    """
+    Make multiple IPC calls, with IPC over HTTP all the calls are sent with a single request
+    :param calls: ordered list of tuples (func_name, data) or (func_name, data, endpoint),
+                  the endpoint can be IPC_ENDPOINT_NFSESSION (default) or IPC_ENDPOINT_CACHE
+    :param return_exceptions: if True the exceptions raised by the target functions are returned
+                              in place of the results, otherwise the first exception will be raised
+    :return: a list with the results of each call, in the same order of the calls
+    """
+    calls = [(call[0],
+              call[1] if len(call) > 1 else None,
+              call[2] if len(call) > 2 else IPC_ENDPOINT_NFSESSION)
+             for call in calls]
+    if G.IPC_OVER_HTTP:
+        results = make_http_call(IPC_ENDPOINT_NFSESSION_BATCH, 'execute', calls)
+    else:
+        results = []
+        for func_name, data, _ in calls:
+            try:
+                results.append(make_addonsignals_call(func_name, data))
+            except Exception as exc:  # pylint: disable=broad-except
+                results.append(exc)
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
 def make_http_call(endpoint, func_name, data=None):
     """
     Make an IPC call via HTTP and wait for it to return.
     The contents of data will be expanded to kwargs and passed into the target function.
     """
-    from urllib.request import build_opener, install_opener, ProxyHandler, urlopen
-    from urllib.error import URLError
-    # Note: Using 'localhost' as address slowdown the call (Windows OS is affected) not sure if it is an urllib issue
-    url = f'http://127.0.0.1:{G.LOCAL_DB.get_value("nf_server_service_port")}{endpoint}/{func_name}'
-    LOG.debug('Handling HTTP IPC call to {}', url)
-    install_opener(build_opener(ProxyHandler({})))  # don't use proxy for localhost
-    try:
-        with urlopen(url=url,
-                     data=pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
-                     timeout=IPC_TIMEOUT_SECS) as f:
-            received_data = f.read()
-            if received_data:
-                _data = pickle.loads(received_data)
-                if isinstance(_data, Exception):
-                    raise _data
-                return _data
+    received_data = IPC_HTTP_CLIENT.post(f'{endpoint}/{func_name}',
+                                         pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    if received_data:
+        _data = pickle.loads(received_data)
+        if isinstance(_data, Exception):
+            raise _data
+        return _data
+    return None
+
+
+def get_ipc_socket_path():
+    """
+    Get the path of the Unix domain socket used for IPC over HTTP
+    :return: the file path, or None when the system does not support it
+    """
+    if not hasattr(socket, 'AF_UNIX') or get_system_platform() != 'linux':
+        return None
+    socket_path = os.path.join(xbmcvfs.translatePath(G.DATA_PATH), IPC_SOCKET_FILENAME)
+    # The max length of a Unix domain socket path is 108 bytes (null terminator included)
+    if len(socket_path.encode('utf-8')) >= 108:
         return None
-    # except HTTPError as exc:
-    #     raise exc
-    except URLError as exc:
+    return socket_path
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class IPCHttpClient:
+    """
+    Persistent HTTP/1.1 keep-alive connection to the add-on service HTTP server.
+    The instance survive to the add-on invocations made with Kodi's reuseLanguageInvoker,
+    so the service port is read from the local database only at first call or after a connection failure.
+    On Linux systems the Unix domain socket of the service is used in place of the TCP port, when available.
+    """
+    # Note: Using 'localhost' as address slowdown the call (Windows OS is affected)
+    HOST_ADDRESS = '127.0.0.1'
+
+    def __init__(self):
+        self._conn = None
+        self._port = None
+        self._mutex = threading.Lock()
+
+    def post(self, path, body):
+        """Send a POST request to the service and return the response body"""
+        with self._mutex:
+            retry_errors = IPC_RETRY_ERRORS_NEW_CONN + (IPC_RETRY_ERRORS_REUSED_CONN if self._conn else ())
+            try:
+                return self._request(path, body)
+            except retry_errors:
+                # The service may have closed an idle connection or restarted with a new port,
+                # then the port will be resolved again and the request retried only once,
+                # over TCP, in case the Unix domain socket file is a leftover of a previous service run.
+                # The other errors (e.g. timeout) are not retried, because the service could have already
+                # executed the request, and the requests that change data must not be executed twice
+                self.close()
+                self._port = None
+            except (OSError, HTTPException) as exc:
+                raise self._get_backend_not_ready_error(exc) from exc
+            try:
+                return self._request(path, body, use_socket=False)
+            except (OSError, HTTPException) as exc:
+                raise self._get_backend_not_ready_error(exc) from exc
+
+    def _get_backend_not_ready_error(self, exc):
+        """Close the connection and get the error to be raised to the caller"""
+        self.close()
+        self._port = None
         err_msg = str(exc)
         if '10049' in err_msg:
             err_msg += '\r\nPossible cause is wrong localhost settings in your operative system.'
         LOG.error(err_msg)
-        raise exceptions.BackendNotReady(err_msg) from exc
+        return exceptions.BackendNotReady(err_msg)
+
+    def _request(self, path, body, use_socket=True):
+        if self._conn is None:
+            self._conn = self._create_connection(use_socket)
+        LOG.debug('Handling HTTP IPC call to {}', path)
+        self._conn.request('POST', path, body=body, headers={'Content-Type': 'application/octet-stream'})
+        response = self._conn.getresponse()
+        received_data = response.read()
+        if response.will_close:
+            self.close()
+        return received_data
+
+    def _create_connection(self, use_socket):
+        socket_path = get_ipc_socket_path() if use_socket else None
+        if socket_path and os.path.exists(socket_path):
+            return UnixHTTPConnection(socket_path, timeout=IPC_TIMEOUT_SECS)
+        if self._port is None:
+            self._port = G.LOCAL_DB.get_value('nf_server_service_port')
+        return HTTPConnection(self.HOST_ADDRESS, self._port, timeout=IPC_TIMEOUT_SECS)
+
+    def close(self):
+        """Close the connection with the service"""
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+
+# The client must be created once, to be reused across the add-on invocations
+IPC_HTTP_CLIENT = IPCHttpClient()
 
 
 def make_addonsignals_call(callname, data):
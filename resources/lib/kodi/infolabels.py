@@ -31,6 +31,10 @@ MEDIA_TYPE_MAPPINGS = {
     common.VideoId.UNSPECIFIED: 'video'
 }
 
+# The infolabels that depend on the profile, these are not saved to the infolabels cache (shared between all profiles)
+# but are always taken from the video data
+PROFILE_INFO_KEYS = ['PlayCount', 'Rating', 'UserRating']
+
 
 def get_video_codec_hint():
     """Suggests which codec the video may have"""
@@ -46,21 +50,63 @@ def get_video_codec_hint():
     return codec
 
 
+def prefetch_info_art(videoids, common_data):
+    """
+    Get from the cache at once the infolabels and art data of the videos of a listing,
+    to be used by add_info_list_item, at end of the listing the new data must be saved with save_info_art
+    """
+    identifiers = [_get_cache_identifier(videoid, common_data['profile_language_code']) for videoid in videoids]
+    common_data['cached_infolabels'] = G.CACHE.get_many(CACHE_INFOLABELS, identifiers)
+    common_data['cached_artinfo'] = G.CACHE.get_many(CACHE_ARTINFO, identifiers)
+    common_data['new_infolabels'] = {}
+    common_data['new_artinfo'] = {}
+
+
+def save_info_art(common_data):
+    """Save to the cache at once the infolabels and art data not cached, obtained by add_info_list_item"""
+    G.CACHE.add_many(CACHE_INFOLABELS, common_data.pop('new_infolabels'), delayed_db_op=True)
+    G.CACHE.add_many(CACHE_ARTINFO, common_data.pop('new_artinfo'), delayed_db_op=True)
+
+
+def _get_cache_identifier(videoid, profile_language_code):
+    return f'{videoid.value}_{profile_language_code}'
+
+
+def _get_cache_entry(bucket, cache_identifier, cached_entries):
+    """Get a cache entry, from the entries obtained by prefetch_info_art when available"""
+    if cached_entries is None:
+        return G.CACHE.get(bucket, cache_identifier)
+    try:
+        return cached_entries[cache_identifier]
+    except KeyError as exc:
+        raise CacheMiss from exc
+
+
+def _add_cache_entry(bucket, cache_identifier, data, delayed_db_op, new_entries):
+    """Add a cache entry, or collect it to be saved by save_info_art when prefetch_info_art is used"""
+    if new_entries is None:
+        G.CACHE.add(bucket, cache_identifier, data, delayed_db_op=delayed_db_op)
+    else:
+        new_entries[cache_identifier] = data
+
+
 def get_info(videoid, item, raw_data, profile_language_code='', delayed_db_op=False, common_data=None):
     """Get the infolabels data"""
     if common_data is None:
         common_data = {}
-    cache_identifier = f'{videoid.value}_{profile_language_code}'
+    cache_identifier = _get_cache_identifier(videoid, profile_language_code)
     try:
-        cache_entry = G.CACHE.get(CACHE_INFOLABELS, cache_identifier)
+        cache_entry = _get_cache_entry(CACHE_INFOLABELS, cache_identifier, common_data.get('cached_infolabels'))
         infos = cache_entry['infos']
         quality_infos = cache_entry['quality_infos']
     except CacheMiss:
         infos, quality_infos = parse_info(videoid, item, raw_data, common_data)
-        G.CACHE.add(CACHE_INFOLABELS, cache_identifier, {'infos': infos, 'quality_infos': quality_infos},
-                    delayed_db_op=delayed_db_op)
+        _add_cache_entry(CACHE_INFOLABELS, cache_identifier, {'infos': infos, 'quality_infos': quality_infos},
+                         delayed_db_op, common_data.get('new_infolabels'))
     # Use a deepcopy of dict to not reflect changes of the dictionary also to the cache
     infos_copy = copy.deepcopy(infos)
+    if item is not None and not hasattr(item, 'contained_titles'):  # VideoLists have not profile infolabels
+        infos_copy.update(_parse_profile_infos(item))
     # Not all skins support PlotOutline, so copy over Plot if it does not exist
     if 'Plot' not in infos_copy and 'PlotOutline' in infos_copy:
         infos_copy['Plot'] = infos_copy['PlotOutline']
@@ -71,7 +117,8 @@ def get_info(videoid, item, raw_data, profile_language_code='', delayed_db_op=Fa
 def add_info_list_item(list_item: ListItemW, videoid, item, raw_data, is_in_mylist, common_data, art_item=None,
                        is_in_remind_me=False):
     """Add infolabels and art to a ListItem"""
-    infos, quality_infos = get_info(videoid, item, raw_data, delayed_db_op=True, common_data=common_data)
+    infos, quality_infos = get_info(videoid, item, raw_data, common_data['profile_language_code'], delayed_db_op=True,
+                                    common_data=common_data)
     list_item.addStreamInfoFromDict(quality_infos)
     if is_in_mylist and common_data.get('mylist_titles_color'):
         # Highlight ListItem title when the videoid is contained in "My list"
@@ -84,7 +131,7 @@ def add_info_list_item(list_item: ListItemW, videoid, item, raw_data, is_in_myli
         infos.pop('PlayCount', None)
     list_item.setInfo('video', infos)
     list_item.setArt(get_art(videoid, art_item or item or {}, common_data['profile_language_code'],
-                             delayed_db_op=True))
+                             delayed_db_op=True, common_data=common_data))
 
 
 def _add_supplemental_plot_info(infos, item, common_data):
@@ -127,15 +174,16 @@ def _add_supplemental_plot_info(infos, item, common_data):
         infos.update({'PlotOutline': plotoutline + suppl_text})
 
 
-def get_art(videoid, item, profile_language_code='', delayed_db_op=False):
+def get_art(videoid, item, profile_language_code='', delayed_db_op=False, common_data=None):
     """Get art infolabels - NOTE: If 'item' arg is None this method can raise TypeError when there is not cache"""
-    cache_identifier = f'{videoid.value}_{profile_language_code}'
+    if common_data is None:
+        common_data = {}
+    cache_identifier = _get_cache_identifier(videoid, profile_language_code)
     try:
-        art = G.CACHE.get(CACHE_ARTINFO, cache_identifier)
+        art = _get_cache_entry(CACHE_ARTINFO, cache_identifier, common_data.get('cached_artinfo'))
     except CacheMiss:
         art = parse_art(videoid, item)
-        G.CACHE.add(CACHE_ARTINFO, cache_identifier, art,
-                    delayed_db_op=delayed_db_op)
+        _add_cache_entry(CACHE_ARTINFO, cache_identifier, art, delayed_db_op, common_data.get('new_artinfo'))
     return art
 
 
@@ -149,7 +197,7 @@ def get_resume_info_from_library(videoid):
 
 
 def parse_info(videoid, item, raw_data, common_data):
-    """Parse info from a path request response into Kodi infolabels"""
+    """Parse info from a path request response into Kodi infolabels (without the PROFILE_INFO_KEYS infolabels)"""
     if (videoid.mediatype == common.VideoId.UNSPECIFIED and
             hasattr(item, 'contained_titles')):
         # Special handling for VideoLists
@@ -164,9 +212,6 @@ def parse_info(videoid, item, raw_data, common_data):
     infos = {'MediaType': MEDIA_TYPE_MAPPINGS[videoid.mediatype]}
     if videoid.mediatype in common.VideoId.TV_TYPES:
         infos['TVShowTitle'] = raw_data['videos'][videoid.tvshowid]['title'].get('value', '')
-    if item.get('watched', {}).get('value'):
-        infos['PlayCount'] = 1
-
     infos.update(_parse_atomic_infos(item))
     infos.update(_parse_referenced_infos(item, raw_data))
     infos.update(_parse_tags(item))
@@ -180,10 +225,20 @@ def parse_info(videoid, item, raw_data, common_data):
     return infos, get_quality_infos(delivery_info, common_data.get('video_codec_hint', get_video_codec_hint()))
 
 
-def _parse_atomic_infos(item):
+def _parse_profile_infos(item):
+    """Parse the infolabels that depend on the profile (PROFILE_INFO_KEYS)"""
+    infos = _parse_atomic_infos(item, is_profile_infos=True)
+    if item.get('watched', {}).get('value'):
+        infos['PlayCount'] = 1
+    return infos
+
+
+def _parse_atomic_infos(item, is_profile_infos=False):
     """Parse those infos into infolabels that are directly accessible from the item dict"""
     infos = {}
     for target, source in paths.INFO_MAPPINGS:
+        if (target in PROFILE_INFO_KEYS) != is_profile_infos:
+            continue
         value = common.get_path_safe(source, item)
         # The dict check is needed when the info requested is not available
         # and jsonGraph return a dict of $type sentinel
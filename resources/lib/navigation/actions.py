@@ -160,6 +160,11 @@ class AddonActionExecutor:
             G.SHARED_DB.clear_stream_continuity()
         ui.show_notification(common.get_local_string(30135))
 
+    def show_cache_stats(self, pathitems=None):  # pylint: disable=unused-argument
+        """Show the statistics of the cache usage"""
+        from xbmcgui import Dialog
+        Dialog().textviewer(heading=common.get_local_string(30750), text=_format_cache_stats(G.CACHE.get_stats()))
+
     def force_update_list(self, pathitems=None):  # pylint: disable=unused-argument
         """Clear the cache of my list to force the update"""
         if self.params['menu_id'] == 'myList':
@@ -260,6 +265,37 @@ class AddonActionExecutor:
         Dialog().textviewer(heading=common.get_local_string(30735), text=text)
 
 
+def _format_cache_stats(stats):
+    text = ''
+    for bucket_name, bucket_stats in stats['buckets'].items():
+        requests = bucket_stats['hits'] + bucket_stats['db_hits'] + bucket_stats['misses']
+        if not requests and not bucket_stats['adds']:
+            continue
+        hits = bucket_stats['hits'] + bucket_stats['db_hits']
+        avg_size = bucket_stats['added_bytes'] / bucket_stats['adds'] if bucket_stats['adds'] else 0
+        memory_size = bucket_stats['memory_size'] / 1024
+        text += (f'[B]{bucket_name}[/B]\n'
+                 f'Hit ratio: {hits / requests if requests else 0:.1%} ({hits}/{requests}), '
+                 f'from database: {bucket_stats["db_hits"] / hits if hits else 0:.1%}\n'
+                 f'Added: {bucket_stats["adds"]}, '
+                 f'average size: {avg_size:.0f} bytes\n'
+                 f'Evictions: {bucket_stats["evictions"]}, expirations: {bucket_stats["expirations"]}\n'
+                 f'In memory: {bucket_stats["memory_entries"]} entries, {memory_size:.1f} KiB\n\n')
+    text += '[B]Latency[/B]\n'
+    for name, latency_stats in stats['latency'].items():
+        ranges = ', '.join(f'{range_name}: {count}' for range_name, count in latency_stats['ranges'].items() if count)
+        text += f'{name}: {latency_stats["count"]} ops, average {latency_stats["avg_ms"]:.3f}ms ({ranges})\n'
+    text += (f'\nCoalesced calls: {stats["coalesced_calls"]}\n'
+             f'Pending database writes: {stats["pending_db_writes"]}')
+    # The status of the IPC servers is available only with IPC over HTTP
+    for server_name, pool_stats in stats.get('servers_pool', {}).items():
+        text += (f'\n\n[B]{server_name}[/B]\n'
+                 f'Busy workers: {pool_stats["busy_workers"]}/{pool_stats["pool_size"]}, '
+                 f'idle connections: {pool_stats["idle_connections"]}\n'
+                 f'Queue depth: {pool_stats["queue_depth"]}, max: {pool_stats["queue_depth_max"]}')
+    return text
+
+
 def sync_library(videoid, operation):
     if (operation
             and G.ADDON.getSettingBool('lib_enabled')
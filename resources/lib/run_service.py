@@ -8,7 +8,7 @@
 """
 import threading
 from socket import gaierror
-from resources.lib.common import select_port, WndHomeProps
+from resources.lib.common import select_port, get_ipc_socket_path, WndHomeProps
 from resources.lib.globals import G
 from resources.lib.upgrade_controller import check_service_upgrade
 from resources.lib.utils.logging import LOG
@@ -29,6 +29,8 @@ class NetflixService:
         self.library_updater = None
         self.nf_server_instance = None
         self.nf_server_thread = None
+        self.nf_ipc_server_instance = None
+        self.nf_ipc_server_thread = None
 
     def init_servers(self):
         """Initialize the HTTP server"""
@@ -38,6 +40,7 @@ class NetflixService:
             self.nf_server_instance = NFThreadedTCPServer((self.HOST_ADDRESS, select_port('NF_SERVER')))
             self.nf_server_instance.allow_reuse_address = True
             self.nf_server_thread = threading.Thread(target=self.nf_server_instance.serve_forever)
+            self._init_ipc_server()
             return True
         except Exception as exc:  # pylint: disable=broad-except
             LOG.error('Background services do not start due to the following error')
@@ -55,6 +58,23 @@ class NetflixService:
             _set_service_status(G.SERVICE_STATUS_ERROR, message)
         return False
 
+    def _init_ipc_server(self):
+        """Initialize the HTTP server over Unix domain socket for the IPC (when supported by the system)"""
+        socket_path = get_ipc_socket_path()
+        if not socket_path:
+            return
+        try:
+            from resources.lib.services.http_server import NFThreadedUnixServer
+            self.nf_ipc_server_instance = NFThreadedUnixServer(socket_path, self.nf_server_instance.netflix_session)
+            self.nf_ipc_server_thread = threading.Thread(target=self.nf_ipc_server_instance.serve_forever)
+        except Exception:  # pylint: disable=broad-except
+            # Not mandatory, the IPC will be made by using the TCP server
+            LOG.warn('[NF_IPC_SERVER] Cannot create the Unix domain socket {}, the TCP server will be used',
+                     socket_path)
+            import traceback
+            LOG.warn(traceback.format_exc())
+            self.nf_ipc_server_instance = None
+
     def start_services(self):
         """Start the background services"""
         from resources.lib.services.library_updater import LibraryUpdateService
@@ -62,8 +82,13 @@ class NetflixService:
         self.nf_server_instance.server_activate()
         self.nf_server_thread.start()
         LOG.info('[NF_SERVER] Thread started')
+        if self.nf_ipc_server_instance:
+            self.nf_ipc_server_thread.start()
+            LOG.info('[NF_IPC_SERVER] Thread started')
 
         self.library_updater = LibraryUpdateService()
+        # Load in background the most used cache data, so the first browsing will be served from memory-cache
+        threading.Thread(target=G.CACHE_MANAGEMENT.warm_start, daemon=True).start()
         # We reset the value in case of any eventuality (add-on disabled, update, etc)
         WndHomeProps[WndHomeProps.CURRENT_DIRECTORY] = None
         # Mark the service as active
@@ -72,11 +97,19 @@ class NetflixService:
     def shutdown(self):
         """Stop the background services"""
         _set_service_status(G.SERVICE_STATUS_STOPPED)
+        if self.nf_ipc_server_instance:
+            self.nf_ipc_server_instance.shutdown()
+            self.nf_ipc_server_instance.server_close()
+            self.nf_ipc_server_instance = None
+            self.nf_ipc_server_thread.join()
+            self.nf_ipc_server_thread = None
         self.nf_server_instance.shutdown()
         self.nf_server_instance.server_close()
         self.nf_server_instance = None
         self.nf_server_thread.join()
         self.nf_server_thread = None
+        # Write to the database the cache data still pending
+        G.CACHE_MANAGEMENT.shutdown()
         LOG.info('Stopped MSL Service')
 
     def run(self):
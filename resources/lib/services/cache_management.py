@@ -7,20 +7,60 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import hashlib
+import lzma
 import sqlite3 as sql
 import threading
-from datetime import datetime, timedelta
-from functools import wraps
-from time import time
+import zlib
+from bisect import bisect_left, insort
+from heapq import heapify, heappop, heappush
+from collections import OrderedDict
+from time import perf_counter, time
 
 from resources.lib import common
 from resources.lib.common import cache_utils
 from resources.lib.common.exceptions import (UnknownCacheBucketError, CacheMiss, DBSQLiteConnectionError,
                                              DBSQLiteError, DBProfilesMissing)
 from resources.lib.globals import G
+from resources.lib.services.cache_stats import STATS_COUNTERS, STATS_LATENCIES, LatencyHistogram
 from resources.lib.utils.logging import LOG
 
 CONN_ISOLATION_LEVEL = None  # Autocommit mode
+CONN_CACHE_SIZE = -4096  # Max size of the page cache of each connection (negative value means KiB)
+
+# The expired cache entries are deleted incrementally on each service tick, to avoid stalling the service
+CLEANING_MAX_MEMORY_ENTRIES = 100  # Max number of expired entries to be deleted from memory-cache per tick
+CLEANING_MAX_DB_ROWS = 500  # Max number of expired rows to be deleted from the database per cleaning
+CLEANING_DB_INTERVAL = 5 * 60  # Interval in seconds between two cleanings of the database
+VACUUM_MAX_PAGES = 1000  # Max number of free pages to be released to the file system after a database cleaning
+
+# The writes to the database are made in background by a write-behind thread
+DB_MAX_QUERY_PARAMS = 500  # Max number of identifiers for each query, old SQLite versions are limited to 999 params
+WRITE_BEHIND_MAX_ROWS = 500  # Number of pending rows that triggers the writing
+WRITE_BEHIND_INTERVAL = 5  # Max time in seconds that the rows can remain pending
+
+# At service start the most used entries of the persistent buckets are loaded in the memory-cache (warm start)
+WARM_START_MAX_ENTRIES = 2000  # Max number of entries to be loaded
+WARM_START_MAX_AGE = 7 * 24 * 60 * 60  # Load only the entries accessed in the last 7 days
+ACCESS_LOG_WRITE_INTERVAL = 10 * 60  # Interval in seconds between two writings of the access counters
+
+# The data of the persistent buckets is saved once in the 'cache_content' table, by hash of the content,
+# and the rows of 'cache_data' refer to it, so that the same data cached by more profiles is not duplicated
+CONTENT_HASH_SIZE = 16  # Size in bytes of the BLAKE2 hash of the content
+# The identifier prefix of the buckets shared between all profiles (see SHARED_BUCKET_NAMES in cache_utils.py)
+SHARED_IDENTIFIER_PREFIX = 'shared_'
+
+# Select the data of the rows, also the old rows without 'content_hash' are supported
+DB_SELECT_CONTENT = ('COALESCE(cache_content.value, cache_data.value), '
+                     'COALESCE(cache_content.compression, cache_data.compression) '
+                     'FROM cache_data LEFT JOIN cache_content ON cache_content.hash = cache_data.content_hash')
+DB_DELETE_UNUSED_CONTENT = ('DELETE FROM cache_content WHERE hash IN '
+                            '(SELECT hash FROM cache_content WHERE NOT EXISTS '
+                            '(SELECT 1 FROM cache_data WHERE cache_data.content_hash = cache_content.hash) LIMIT ?)')
+
+# At service stop the data of the listings buckets (SNAPSHOT_BUCKET_NAMES) is saved to the database (snapshot),
+# to be restored at the next service start, only for the same add-on version and profile
+SNAPSHOT_COMPRESSION_LEVEL = 1  # The fastest compression level, to not slow down the service stop
 
 # All the cache is automatically allocated by profile by using a prefix in the cache identifier
 # and the data remains in memory until the service will be stopped (if it is not specified as persistent)
@@ -33,55 +73,50 @@ CONN_ISOLATION_LEVEL = None  # Autocommit mode
 # by set 'is_persistent' to True in the bucket variable (see cache_utils.py)
 
 
-def handle_connection(func):
-    """A decorator that handle the connection status with the database"""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = None
-        is_not_thread_safe = not G.IS_SQLITE3_THREADSAFE
-        try:
-            if not args[0].is_connected:
-                if is_not_thread_safe:
-                    args[0].mutex.acquire()
-                args[0].conn = sql.connect(args[0].db_file_path,
-                                           isolation_level=CONN_ISOLATION_LEVEL,
-                                           check_same_thread = is_not_thread_safe)
-                args[0].is_connected = True
-                conn = args[0].conn
-            return func(*args, **kwargs)
-        except sql.Error as exc:
-            LOG.error('SQLite error {}:', exc.args[0])
-            raise DBSQLiteConnectionError from exc
-        finally:
-            if conn and is_not_thread_safe:
-                args[0].is_connected = False
-                conn.close()
-                args[0].mutex.release()
-    return wrapper
-
-
 class CacheManagement:
     """Cache management"""
 
     def __init__(self):
         self._identifier_prefix = None
-        self.mutex = threading.Lock()
+        # The reentrant lock allows to call a method that access to the database from another one
+        self.mutex = threading.RLock()
         self.local_storage = threading.local()
-        self.conn = None
         self.db_file_path = None
         self.memory_cache = {}
+        # Approximate size in bytes of the data in each memory-cache bucket
+        self.memory_cache_size = {}
+        # Sorted list of the identifiers of each memory-cache bucket, to find quickly the identifiers by prefix
+        self.memory_cache_keys = {}
+        # Min-heap of (expires, identifier) of each memory-cache bucket, to find quickly the expired entries
+        self.memory_cache_expiry = {}
+        self.memory_mutex = threading.Lock()
+        self.buckets_limits = {bucket['name']: (bucket['max_entries'], bucket['max_size'],
+                                                bucket['stale_grace_period'])
+                               for bucket in cache_utils.BUCKETS}
         self._initialize()
-        self.next_schedule = _compute_next_schedule()
+        self.next_db_cleaning = time() + CLEANING_DB_INTERVAL
         self.ttl_values = {}
         self.load_ttl_values()
-        self.pending_db_ops_add = []
+        # The rows to be written to the database, by (bucket name, identifier) so that the repeated writes
+        # to the same key are coalesced
+        self.pending_db_writes = {}
+        self.pending_db_writes_mutex = threading.Lock()
+        # Prevents a deletion from being overwritten by the writing of the pending rows in progress
+        self.db_write_mutex = threading.Lock()
+        self.db_writer_event = threading.Event()
+        self.db_writer_stop = False
+        # The number of accesses to the entries of the persistent buckets, by (bucket name, identifier),
+        # they are aggregated in memory and written to the database by the write-behind thread
+        # at long intervals and at service stop, then are used for the warm start
+        self.access_log = {}
+        self.next_access_log_write = time() + ACCESS_LOG_WRITE_INTERVAL
+        # Counters of the operations by bucket name, and the latency of the time-consuming operations
+        self.stats = {bucket['name']: dict.fromkeys(STATS_COUNTERS, 0) for bucket in cache_utils.BUCKETS}
+        self.latency_stats = {name: LatencyHistogram() for name in STATS_LATENCIES}
+        self.db_writer_thread = threading.Thread(target=self._db_writer_loop, name='CacheDBWriter', daemon=True)
+        self.db_writer_thread.start()
         # Slot allocation for IPC
-        slots = [
-            self.get,
-            self.add,
-            self.delete,
-            self.clear
-        ]
+        slots = [self.get_stats, self.get, self.get_many, self.add, self.add_many, self.delete, self.clear]
         for slot in slots:
             # For AddonSignals IPC
             common.register_slot(slot, slot.__name__)
@@ -91,7 +126,8 @@ class CacheManagement:
         self.ttl_values = {
             'CACHE_TTL': G.ADDON.getSettingInt('cache_ttl') * 60,
             'CACHE_MYLIST_TTL': G.ADDON.getSettingInt('cache_mylist_ttl') * 60,
-            'CACHE_METADATA_TTL': G.ADDON.getSettingInt('cache_metadata_ttl') * 24 * 60 * 60
+            'CACHE_METADATA_TTL': G.ADDON.getSettingInt('cache_metadata_ttl') * 24 * 60 * 60,
+            'CACHE_NEGATIVE_TTL': G.ADDON.getSettingInt('cache_negative_ttl') * 60
         }
 
     @property
@@ -109,51 +145,189 @@ class CacheManagement:
         self._identifier_prefix = G.LOCAL_DB.get_active_profile_guid() + '_'
         return self._identifier_prefix
 
-    def _add_prefix(self, identifier):
-        return self.identifier_prefix + identifier
+    def _get_identifier_prefix(self, bucket):
+        if bucket['name'] in cache_utils.SHARED_BUCKET_NAMES:
+            return SHARED_IDENTIFIER_PREFIX
+        return self.identifier_prefix
 
-    @property
-    def is_connected(self):
-        return getattr(self.local_storage, 'is_connected', False)
+    def _add_prefix(self, bucket, identifier):
+        return self._get_identifier_prefix(bucket) + identifier
 
-    @is_connected.setter
-    def is_connected(self, val):
-        self.local_storage.is_connected = val
+    @property
+    def conn(self):
+        """
+        Get the connection to the database of the current thread,
+        the connection is kept open to avoid reopening the database and to reuse the prepared statements
+        """
+        conn = getattr(self.local_storage, 'conn', None)
+        if conn is None:
+            conn = sql.connect(self.db_file_path, isolation_level=CONN_ISOLATION_LEVEL)
+            # With WAL journal the 'NORMAL' mode is safe from corruption, a power loss can only rollback
+            # the last transactions, that for cached data is not a problem
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(f'PRAGMA cache_size = {CONN_CACHE_SIZE}')
+            self.local_storage.conn = conn
+        return conn
 
     def _initialize(self):
         from resources.lib.database.db_utils import get_local_db_path
         self.db_file_path = get_local_db_path('nf_cache.sqlite3')
-        self.conn = sql.connect(self.db_file_path)
         self._create_table()
 
     def _create_table(self):
         cur = self.conn.cursor()
+        # Allow to release the free pages with 'incremental_vacuum', this has effect only when the database
+        # is created, the existing databases are converted once with a VACUUM (see _convert_db_auto_vacuum)
+        cur.execute('PRAGMA auto_vacuum = INCREMENTAL')
         table = str('CREATE TABLE IF NOT EXISTS cache_data ('
                     'bucket        TEXT NOT NULL,'
                     'identifier    TEXT NOT NULL,'
                     'value         BLOB,'
                     'expires       INT,'
                     'last_modified INT,'
+                    'compression   INT NOT NULL DEFAULT 0,'
+                    'hits          INT NOT NULL DEFAULT 0,'
+                    'last_access   INT NOT NULL DEFAULT 0,'
+                    'content_hash  BLOB,'
                     'PRIMARY KEY (bucket, identifier));')
         cur.execute(table)
-        self.conn.close()
+        table = str('CREATE TABLE IF NOT EXISTS cache_content ('
+                    'hash          BLOB PRIMARY KEY NOT NULL,'
+                    'value         BLOB,'
+                    'compression   INT NOT NULL DEFAULT 0);')
+        cur.execute(table)
+        # Add the columns added later to the existing databases
+        columns = [column_info[1] for column_info in cur.execute('PRAGMA table_info(cache_data)')]
+        for column in ['compression', 'hits', 'last_access']:
+            if column not in columns:
+                cur.execute(f'ALTER TABLE cache_data ADD COLUMN {column} INT NOT NULL DEFAULT 0')
+        # The rows saved before the introduction of 'cache_content' have the data in the 'value' column
+        if 'content_hash' not in columns:
+            cur.execute('ALTER TABLE cache_data ADD COLUMN content_hash BLOB')
+        table = str('CREATE TABLE IF NOT EXISTS cache_snapshot ('
+                    'bucket        TEXT NOT NULL,'
+                    'identifier    TEXT NOT NULL,'
+                    'value         BLOB,'
+                    'compression   INT NOT NULL DEFAULT 0,'
+                    'expires       INT,'
+                    'version       TEXT NOT NULL);')
+        cur.execute(table)
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_cache_data_expires ON cache_data (bucket, expires)')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_cache_data_content_hash ON cache_data (content_hash)')
+        # The WAL journal allows the readers to not be blocked by a writer, and it is faster to write
+        # (the journal mode is persistent, so it is kept also by the next connections)
+        journal_mode = cur.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+        if journal_mode != 'wal':
+            LOG.warn('Cannot enable WAL journal mode on the cache database, current mode: {}', journal_mode)
+        if cur.execute('PRAGMA auto_vacuum').fetchone()[0] == 0:  # 0 = NONE
+            threading.Thread(target=self._convert_db_auto_vacuum, name='CacheDBVacuum', daemon=True).start()
 
     def on_service_tick(self):
-        """Check if expired cache cleaning is due and trigger it"""
-        if self.next_schedule <= datetime.now():
-            LOG.debug('Triggering expired cache cleaning')
-            self.delete_expired()
-            G.LOCAL_DB.set_value('clean_cache_last_start', datetime.now())
-            self.next_schedule = _compute_next_schedule()
+        """Delete a limited amount of expired cache entries (the free pages are released by 'incremental_vacuum')"""
+        self._delete_expired_memory(CLEANING_MAX_MEMORY_ENTRIES)
+        if self.next_db_cleaning <= time():
+            self._delete_expired_db(CLEANING_MAX_DB_ROWS)
+            self.next_db_cleaning = time() + CLEANING_DB_INTERVAL
 
     def _get_cache_bucket(self, bucket_name):
         """Get the data contained to a cache bucket"""
+        bucket_content = self.memory_cache.get(bucket_name)
+        if bucket_content is None:
+            with self.memory_mutex:
+                bucket_content = self._create_cache_bucket(bucket_name)
+        return bucket_content
+
+    def _create_cache_bucket(self, bucket_name):
+        """Create the data of a cache bucket, if not exists (to be called with memory_mutex acquired)"""
         if bucket_name not in self.memory_cache:
             if bucket_name not in cache_utils.BUCKET_NAMES:  # Verify only at the first time (something is wrong in source code)
                 raise UnknownCacheBucketError()
-            self.memory_cache[bucket_name] = {}
+            # The order of the items is used to know the least recently used entries
+            self.memory_cache[bucket_name] = OrderedDict()
+            self.memory_cache_keys[bucket_name] = []
+            self.memory_cache_expiry[bucket_name] = []
         return self.memory_cache[bucket_name]
 
+    def _find_identifiers(self, bucket_name, identifier_prefix):
+        """Find the identifiers of a memory-cache bucket that start with the specified prefix"""
+        identifiers = []
+        with self.memory_mutex:
+            keys = self.memory_cache_keys[bucket_name]
+            index = bisect_left(keys, identifier_prefix)
+            while index < len(keys) and keys[index].startswith(identifier_prefix):
+                identifiers.append(keys[index])
+                index += 1
+        return identifiers
+
+    def _add_entry(self, bucket_name, identifier, cache_entry, only_if_missing=False):
+        """
+        Add an entry to a memory-cache bucket, the least recently used entries are evicted when over the limits
+        :param only_if_missing: if True an existing entry is not overwritten (atomic check, for data that can be old)
+        :return: True if the entry has been added
+        """
+        max_entries, max_size, grace_period = self.buckets_limits[bucket_name]
+        timestamp = int(time())
+        with self.memory_mutex:
+            bucket_content = self._create_cache_bucket(bucket_name)
+            if only_if_missing and identifier in bucket_content:
+                return False
+            if not self._pop_entry(bucket_name, identifier):
+                insort(self.memory_cache_keys[bucket_name], identifier)
+            bucket_content[identifier] = cache_entry
+            heappush(self.memory_cache_expiry[bucket_name], (cache_entry['expires'], identifier))
+            size = self.memory_cache_size.get(bucket_name, 0) + cache_entry['size']
+            # Evict the least recently used entries when expired (over the grace period)
+            # or when the bucket is over the limits
+            while len(bucket_content) > 1:
+                oldest_entry = next(iter(bucket_content.values()))
+                if (oldest_entry['expires'] + grace_period >= timestamp and len(bucket_content) <= max_entries
+                        and size <= max_size):
+                    break
+                oldest_identifier, _ = bucket_content.popitem(last=False)
+                self._remove_key(bucket_name, oldest_identifier)
+                size -= oldest_entry['size']
+                if oldest_entry['expires'] + grace_period < timestamp:
+                    self.stats[bucket_name]['expirations'] += 1
+                else:
+                    self.stats[bucket_name]['evictions'] += 1
+            self.memory_cache_size[bucket_name] = size
+        return True
+
+    def _remove_entry(self, bucket_name, identifier):
+        """Remove an entry from a memory-cache bucket"""
+        with self.memory_mutex:
+            self._pop_entry(bucket_name, identifier)
+
+    def _pop_entry(self, bucket_name, identifier):
+        # To be called with memory_mutex acquired
+        cache_entry = self.memory_cache.get(bucket_name, {}).pop(identifier, None)
+        if cache_entry:
+            self.memory_cache_size[bucket_name] -= cache_entry['size']
+            self._remove_key(bucket_name, identifier)
+        return cache_entry
+
+    def _remove_key(self, bucket_name, identifier):
+        # To be called with memory_mutex acquired
+        keys = self.memory_cache_keys[bucket_name]
+        index = bisect_left(keys, identifier)
+        if index < len(keys) and keys[index] == identifier:
+            del keys[index]
+
+    def get_stats(self):
+        """Get the statistics of the cache usage"""
+        buckets_stats = {}
+        for bucket_name, counters in self.stats.items():
+            bucket_stats = dict(counters)
+            bucket_stats['memory_entries'] = len(self.memory_cache.get(bucket_name, {}))
+            bucket_stats['memory_size'] = self.memory_cache_size.get(bucket_name, 0)
+            buckets_stats[bucket_name] = bucket_stats
+        return {
+            'buckets': buckets_stats,
+            'latency': {name: histogram.get_stats() for name, histogram in self.latency_stats.items()},
+            'coalesced_calls': cache_utils.CACHE_OUTPUT_STATS['coalesced_calls'],
+            'pending_db_writes': len(self.pending_db_writes)
+        }
+
     def get(self, bucket, identifier):
         """
         Get a item from cache bucket
@@ -163,33 +337,180 @@ class CacheManagement:
         :raise CacheMiss: if cache entry does not exist
         """
         try:
-            identifier = self._add_prefix(identifier)
-            cache_entry = self._get_cache_bucket(bucket['name'])[identifier]
-            if cache_entry['expires'] < int(time()):
-                # Cache expired
-                raise CacheMiss()
-            return cache_utils.deserialize_data(cache_entry['data'])
+            data, _ = self._get_entry(bucket, identifier, False)
+        except CacheMiss:
+            self.stats[bucket['name']]['misses'] += 1
+            raise
+        return self._deserialize(bucket, data)
+
+    def get_allow_stale(self, bucket, identifier):
+        """
+        Get a item from cache bucket, the expired data is returned until the grace period of the bucket is elapsed
+        :param bucket: bucket where read the data
+        :param identifier: key identifier of the data
+        :return: a tuple with the data and a boolean value that is True when the data is expired (stale)
+        :raise CacheMiss: if cache entry does not exist or the grace period is elapsed
+        """
+        try:
+            data, expires = self._get_entry(bucket, identifier, True)
+        except CacheMiss:
+            self.stats[bucket['name']]['misses'] += 1
+            raise
+        return self._deserialize(bucket, data), expires < int(time())
+
+    def _get_entry(self, bucket, identifier, allow_stale):
+        """Get the serialized data and the expiration timestamp of a cache entry"""
+        try:
+            identifier = self._add_prefix(bucket, identifier)
+            bucket_content = self._get_cache_bucket(bucket['name'])
+            cache_entry = bucket_content[identifier]
+            timestamp = int(time())
+            if cache_entry['expires'] < timestamp:
+                if cache_entry['expires'] + bucket['stale_grace_period'] < timestamp:
+                    # Cache expired, release the memory
+                    self._remove_entry(bucket['name'], identifier)
+                    self.stats[bucket['name']]['expirations'] += 1
+                    raise CacheMiss()
+                if not allow_stale:
+                    raise CacheMiss()
+            bucket_content.move_to_end(identifier)
+            self.stats[bucket['name']]['hits'] += 1
+            if bucket['is_persistent']:
+                self._log_access(bucket['name'], identifier)
+            return cache_entry['data'], cache_entry['expires']
         except KeyError as exc:
             if bucket['is_persistent']:
-                return cache_utils.deserialize_data(self._get_db(bucket['name'], identifier))
+                grace_period = bucket['stale_grace_period'] if allow_stale else 0
+                # The data could be not yet written to the database
+                row_data = self.pending_db_writes.get((bucket['name'], identifier))
+                if row_data:
+                    if row_data[3] + grace_period < time():
+                        raise CacheMiss() from exc
+                    self.stats[bucket['name']]['hits'] += 1
+                    return row_data[2], row_data[3]
+                start_time = perf_counter()
+                result = self._get_db(bucket['name'], identifier, grace_period)
+                self.latency_stats['db_read'].add(perf_counter() - start_time)
+                self.stats[bucket['name']]['db_hits'] += 1
+                self._log_access(bucket['name'], identifier)
+                return result
             raise CacheMiss from exc
         except DBProfilesMissing as exc:
             # Raised by _add_prefix there is no active profile guid when add-on is installed from scratch
             raise CacheMiss from exc
 
-    @handle_connection
-    def _get_db(self, bucket_name, identifier):
+    def get_many(self, bucket, identifiers):
+        """
+        Get multiple items from cache bucket, the items not in the memory-cache are read from the database at once
+        :param bucket: bucket where read the data
+        :param identifiers: list of key identifiers of the data
+        :return: a dict with the data of the identifiers found in cache (the missing identifiers are not included)
+        """
+        try:
+            identifier_prefix = self._get_identifier_prefix(bucket)
+        except DBProfilesMissing:
+            # There is no active profile guid when add-on is installed from scratch
+            return {}
+        timestamp = int(time())
+        entries_data = {}
+        missing_identifiers = {}
+        bucket_content = self._get_cache_bucket(bucket['name'])
+        for identifier in identifiers:
+            prefixed_identifier = identifier_prefix + identifier
+            cache_entry = bucket_content.get(prefixed_identifier)
+            if cache_entry and cache_entry['expires'] >= timestamp:
+                try:
+                    bucket_content.move_to_end(prefixed_identifier)
+                except KeyError:  # Removed in the meantime by another thread
+                    pass
+                entries_data[identifier] = cache_entry['data']
+                if bucket['is_persistent']:
+                    self._log_access(bucket['name'], prefixed_identifier)
+                continue
+            if bucket['is_persistent']:
+                # The data could be not yet written to the database
+                row_data = self.pending_db_writes.get((bucket['name'], prefixed_identifier))
+                if row_data and row_data[3] >= timestamp:
+                    entries_data[identifier] = row_data[2]
+                    continue
+                missing_identifiers[prefixed_identifier] = identifier
+        bucket_stats = self.stats[bucket['name']]
+        bucket_stats['hits'] += len(entries_data)
+        if missing_identifiers:
+            start_time = perf_counter()
+            rows = self._get_many_db(bucket['name'], list(missing_identifiers))
+            self.latency_stats['db_read'].add(perf_counter() - start_time)
+            for prefixed_identifier, data in rows:
+                entries_data[missing_identifiers[prefixed_identifier]] = data
+                self._log_access(bucket['name'], prefixed_identifier)
+            bucket_stats['db_hits'] += len(rows)
+        bucket_stats['misses'] += len(identifiers) - len(entries_data)
+        results = {}
+        for identifier, data in entries_data.items():
+            try:
+                results[identifier] = self._deserialize(bucket, data)
+            except CacheMiss:
+                pass
+        return results
+
+    @cache_utils.handle_connection
+    def _get_many_db(self, bucket_name, identifiers):
+        """Get the data of multiple identifiers, return a list of tuples (identifier, data)"""
+        results = []
+        try:
+            cursor = self.conn.cursor()
+            for index in range(0, len(identifiers), DB_MAX_QUERY_PARAMS):
+                identifiers_chunk = identifiers[index:index + DB_MAX_QUERY_PARAMS]
+                query = (f'SELECT identifier, {DB_SELECT_CONTENT} '
+                         'WHERE '
+                         'expires > ? AND '
+                         f'bucket = ? AND identifier IN ({", ".join(["?"] * len(identifiers_chunk))})')
+                cursor.execute(query, [time(), bucket_name] + identifiers_chunk)
+                for identifier, value, compression in cursor.fetchall():
+                    try:
+                        results.append((identifier, cache_utils.decompress_data(value, compression)))
+                    except (zlib.error, lzma.LZMAError) as exc:
+                        LOG.error('It was not possible to decompress the cache data: {}', exc)
+            return results
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            raise DBSQLiteError from exc
+
+    def _serialize(self, data):
+        start_time = perf_counter()
+        data = cache_utils.serialize_data(data)
+        self.latency_stats['serialize'].add(perf_counter() - start_time)
+        return data
+
+    def _deserialize(self, bucket, data):
+        if bucket['name'] in cache_utils.LIVE_OBJECT_BUCKET_NAMES:
+            # The memory-cache of the bucket keeps the object as is
+            return data
+        start_time = perf_counter()
+        data = cache_utils.deserialize_data(data)
+        self.latency_stats['deserialize'].add(perf_counter() - start_time)
+        return data
+
+    def _log_access(self, bucket_name, identifier):
+        key = (bucket_name, identifier)
+        self.access_log[key] = self.access_log.get(key, 0) + 1
+
+    @cache_utils.handle_connection
+    def _get_db(self, bucket_name, identifier, grace_period=0):
         try:
             cursor = self.conn.cursor()
-            query = ('SELECT value FROM cache_data '
+            query = (f'SELECT expires, {DB_SELECT_CONTENT} '
                      'WHERE '
                      'expires > ? AND '
                      'bucket = ? AND identifier = ?')
-            cursor.execute(query, (time(), bucket_name, identifier))
+            cursor.execute(query, (time() - grace_period, bucket_name, identifier))
             result = cursor.fetchone()
             if result is None:
                 raise CacheMiss()
-            return result[0]
+            return cache_utils.decompress_data(result[1], result[2]), result[0]
+        except (zlib.error, lzma.LZMAError) as exc:
+            LOG.error('It was not possible to decompress the cache data: {}', exc)
+            raise CacheMiss from exc
         except sql.Error as exc:
             LOG.error('SQLite error {}:', exc.args[0])
             raise DBSQLiteError from exc
@@ -202,61 +523,288 @@ class CacheManagement:
         :param data: the content
         :param ttl: override default expiration (in seconds)
         :param expires: override default expiration (in timestamp) if specified override also the 'ttl' value
-        :param delayed_db_op: if True, queues the adding operation for the db, then is mandatory to call
-                              'execute_pending_db_add' at end of all operations to apply the changes to the db
-                              (only for persistent buckets)
+        :param delayed_db_op: if True, the data is written to the db with the next writing of the pending rows,
+                              to write them as soon as possible call 'execute_pending_db_ops' at end of all
+                              operations, otherwise the writing is requested immediately
+                              (only for persistent buckets, the writing is always made in background)
         """
         try:
-            data = cache_utils.serialize_data(data)
-            identifier = self._add_prefix(identifier)
+            # The data is serialized also when the object is kept as is, to know the size and to ensure that
+            # can be serialized later (IPC and snapshot)
+            serialized_data = self._serialize(data)
+            if bucket['name'] not in cache_utils.LIVE_OBJECT_BUCKET_NAMES:
+                data = serialized_data
+            identifier = self._add_prefix(bucket, identifier)
             if not expires:
                 if not ttl and bucket['default_ttl']:
                     ttl = self.ttl_values[bucket['default_ttl']]
                 expires = int(time() + ttl)
-            cache_entry = {'expires': expires, 'data': data}
+            cache_entry = {'expires': expires, 'data': data, 'size': len(serialized_data)}
             # Save the item data to memory-cache
-            self._get_cache_bucket(bucket['name']).update({identifier: cache_entry})
+            self._add_entry(bucket['name'], identifier, cache_entry)
+            self.stats[bucket['name']]['adds'] += 1
+            self.stats[bucket['name']]['added_bytes'] += len(serialized_data)
             if bucket['is_persistent']:
-                row_data = (bucket['name'], identifier, sql.Binary(data), expires, int(time()))
-                if delayed_db_op:
-                    # Add to pending operations
-                    self.pending_db_ops_add.append(row_data)
-                else:
-                    # Save the item data to the cache database
-                    self._add_db(row_data)
+                row_data = (bucket['name'], identifier, data, expires, int(time()))
+                with self.pending_db_writes_mutex:
+                    self.pending_db_writes[(bucket['name'], identifier)] = row_data
+                    pending_rows = len(self.pending_db_writes)
+                if not delayed_db_op or pending_rows >= WRITE_BEHIND_MAX_ROWS:
+                    self.db_writer_event.set()
         except DBProfilesMissing:
             # Raised by _add_prefix there is no active profile guid when add-on is installed from scratch
             pass
 
-    @handle_connection
-    def _add_db(self, row_data):
+    def add_many(self, bucket, entries, ttl=None, expires=None, delayed_db_op=False):
+        """
+        Add or update multiple items to a cache bucket
+        :param bucket: bucket where save the data
+        :param entries: a dict with the key identifiers and the data
+        :param ttl: override default expiration (in seconds)
+        :param expires: override default expiration (in timestamp) if specified override also the 'ttl' value
+        :param delayed_db_op: see 'add' method
+        """
+        for identifier, data in entries.items():
+            self.add(bucket, identifier, data, ttl=ttl, expires=expires, delayed_db_op=True)
+        if not delayed_db_op and bucket['is_persistent'] and entries:
+            self.execute_pending_db_ops()
+
+    def execute_pending_db_ops(self):
+        """Request to write the pending rows to the database, the writing is made in background"""
+        self.db_writer_event.set()
+
+    def _db_writer_loop(self):
+        """Write the pending rows to the database, when requested or when the time interval is elapsed"""
+        while not self.db_writer_stop:
+            self.db_writer_event.wait(WRITE_BEHIND_INTERVAL)
+            self.db_writer_event.clear()
+            try:
+                self._write_pending_db_rows()
+                if self.next_access_log_write <= time():
+                    self._write_access_log()
+            except Exception as exc:  # pylint: disable=broad-except
+                LOG.error('Writing of the cache data to the database failed: {}', exc)
+        self._write_pending_db_rows()
+        self._write_access_log()
+
+    def _write_pending_db_rows(self):
+        with self.db_write_mutex:
+            with self.pending_db_writes_mutex:
+                if not self.pending_db_writes:
+                    return
+                pending_db_writes = self.pending_db_writes.copy()
+            contents_data = {}
+            rows_data = []
+            for bucket_name, identifier, data, expires, last_modified in pending_db_writes.values():
+                content_hash = hashlib.blake2b(data, digest_size=CONTENT_HASH_SIZE).digest()
+                if content_hash not in contents_data:
+                    # The data is compressed here to keep the time-consuming operation out of the add method
+                    contents_data[content_hash] = (content_hash, *cache_utils.compress_data(data))
+                # The writing counts as an access, so that the new entries can also be loaded by the warm start
+                rows_data.append((bucket_name, identifier, content_hash, expires, last_modified, last_modified))
+            start_time = perf_counter()
+            self._add_db(list(contents_data.values()), rows_data)
+            self.latency_stats['db_write'].add(perf_counter() - start_time)
+            # The rows are removed only now to allow the reading of the data while the writing is in progress
+            with self.pending_db_writes_mutex:
+                for key, row_data in pending_db_writes.items():
+                    if self.pending_db_writes.get(key) is row_data:
+                        del self.pending_db_writes[key]
+
+    @cache_utils.handle_connection
+    def _write_access_log(self):
+        if not self.access_log:
+            return
+        access_log, self.access_log = self.access_log, {}
+        self.next_access_log_write = time() + ACCESS_LOG_WRITE_INTERVAL
+        timestamp = int(time())
+        cursor = self.conn.cursor()
         try:
-            cursor = self.conn.cursor()
-            query = ('REPLACE INTO cache_data (bucket, identifier, value, expires, last_modified) '
-                     'VALUES(?, ?, ?, ?, ?)')
-            cursor.execute(query, row_data)
+            cursor.execute("BEGIN TRANSACTION;")
+            query = 'UPDATE cache_data SET hits = hits + ?, last_access = ? WHERE bucket = ? AND identifier = ?'
+            cursor.executemany(query, [(hits, timestamp, bucket_name, identifier)
+                                       for (bucket_name, identifier), hits in access_log.items()])
+            cursor.execute("COMMIT;")
         except sql.Error as exc:
             LOG.error('SQLite error {}:', exc.args[0])
+            if self.conn.in_transaction:
+                cursor.execute("ROLLBACK;")
             raise DBSQLiteError from exc
 
-    @handle_connection
-    def execute_pending_db_ops(self):
-        """Execute all pending db operations at once"""
+    @cache_utils.handle_connection
+    def _add_db(self, contents_data, rows_data):
         # Required for cases when the devices has a slow performance storage like old sdcard or mechanical hdd,
         # this devices do not have enough speed performance to perform multiple individual db writing operations
-        # in a faster way and this results in a long delay in loading the lists,
-        # making a single db write for all changes greatly speeds up the loading of the lists
-        if self.pending_db_ops_add:
+        # in a faster way, making a single db write for all changes greatly speeds up the writing
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN TRANSACTION;")
+            # The content already saved by another profile is kept as is
+            query = 'INSERT OR IGNORE INTO cache_content (hash, value, compression) VALUES(?, ?, ?)'
+            cursor.executemany(query, contents_data)
+            # Update the existing rows in place, to keep the 'hits' counter used by the warm start
+            query = ('INSERT INTO cache_data (bucket, identifier, content_hash, expires, last_modified, last_access) '
+                     'VALUES(?, ?, ?, ?, ?, ?) ON CONFLICT(bucket, identifier) DO UPDATE SET '
+                     'content_hash = excluded.content_hash, expires = excluded.expires, '
+                     'last_modified = excluded.last_modified, last_access = excluded.last_access, value = NULL')
+            cursor.executemany(query, rows_data)
+            cursor.execute("COMMIT;")
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            if self.conn.in_transaction:
+                cursor.execute("ROLLBACK;")
+            raise DBSQLiteError from exc
+
+    def warm_start(self):
+        """
+        Load in the memory-cache the data of the listings buckets saved at the last service stop,
+        and the most used entries of the persistent buckets for the active profile and of the shared buckets
+        """
+        try:
+            identifier_prefix = self.identifier_prefix
+        except DBProfilesMissing:
+            # There is no active profile guid when add-on is installed from scratch
+            return
+        try:
+            self._load_snapshot(identifier_prefix)
+            rows = self._get_db_most_used(identifier_prefix)
+        except DBSQLiteError:
+            return
+        loaded_entries = 0
+        for bucket_name, identifier, expires, value, compression in rows:
+            if bucket_name not in cache_utils.BUCKET_NAMES:
+                # The bucket has been removed or renamed by an add-on update
+                continue
             try:
-                cursor = self.conn.cursor()
-                cursor.execute("BEGIN TRANSACTION;")
-                query = ('REPLACE INTO cache_data (bucket, identifier, value, expires, last_modified) '
-                         'VALUES(?, ?, ?, ?, ?)')
-                cursor.executemany(query, self.pending_db_ops_add)
-                cursor.execute("COMMIT;")
-                self.pending_db_ops_add = []
-            except sql.Error as exc:
-                LOG.error('SQLite error {}:', exc.args[0])
+                data = cache_utils.decompress_data(value, compression)
+            except (zlib.error, lzma.LZMAError):
+                continue
+            # The entries added or accessed in the meantime (the servers are already started) have newer data
+            if self._add_entry(bucket_name, identifier, {'expires': expires, 'data': data, 'size': len(data)},
+                               only_if_missing=True):
+                loaded_entries += 1
+        LOG.debug('Warm start of the cache, loaded {} entries from the database', loaded_entries)
+
+    @cache_utils.handle_connection
+    def _get_db_most_used(self, identifier_prefix):
+        timestamp = int(time())
+        # The rows are returned from the least to the most used, so when added to the memory-cache,
+        # in case of a full bucket the least used entries will be evicted
+        query = (f'SELECT bucket, identifier, expires, {DB_SELECT_CONTENT} '
+                 'WHERE cache_data.rowid IN '
+                 '(SELECT rowid FROM cache_data '
+                 'WHERE ((identifier >= ? AND identifier < ?) OR (identifier >= ? AND identifier < ?)) '
+                 'AND expires > ? AND last_access > ? '
+                 'ORDER BY hits DESC, last_access DESC LIMIT ?) '
+                 'ORDER BY hits, last_access')
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(query, (identifier_prefix, _get_prefix_upper_bound(identifier_prefix),
+                                   SHARED_IDENTIFIER_PREFIX, _get_prefix_upper_bound(SHARED_IDENTIFIER_PREFIX),
+                                   timestamp, timestamp - WARM_START_MAX_AGE, WARM_START_MAX_ENTRIES))
+            return cursor.fetchall()
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            raise DBSQLiteError from exc
+
+    def _load_snapshot(self, identifier_prefix):
+        """Load in the memory-cache the data of the listings buckets saved at the last service stop"""
+        timestamp = int(time())
+        loaded_entries = 0
+        failed_entries = 0
+        rows = self._get_snapshot_db()
+        for bucket_name, identifier, value, compression, expires, version in rows:
+            # The data saved by another add-on version could be incompatible (e.g. changes to the data types),
+            # and the data of the other profiles is not needed
+            if version != G.VERSION or not identifier.startswith(identifier_prefix):
+                continue
+            if (bucket_name not in cache_utils.SNAPSHOT_BUCKET_NAMES
+                    or expires + self.buckets_limits[bucket_name][2] < timestamp):
+                continue
+            try:
+                data = cache_utils.decompress_data(value, compression)
+                cache_entry = {'expires': expires, 'data': data, 'size': len(data)}
+                if bucket_name in cache_utils.LIVE_OBJECT_BUCKET_NAMES:
+                    cache_entry['data'] = cache_utils.deserialize_data(data)
+            except (zlib.error, lzma.LZMAError, CacheMiss):
+                failed_entries += 1
+                continue
+            # The entries added in the meantime (the servers are already started) have newer data
+            if self._add_entry(bucket_name, identifier, cache_entry, only_if_missing=True):
+                loaded_entries += 1
+        if failed_entries:
+            LOG.error('Warm start of the cache, {} entries of the snapshot cannot be restored', failed_entries)
+        LOG.debug('Warm start of the cache, loaded {} entries from the snapshot, skipped {} entries',
+                  loaded_entries, len(rows) - loaded_entries)
+
+    @cache_utils.handle_connection
+    def _get_snapshot_db(self):
+        """Get the rows of the snapshot, the snapshot is deleted so that can be restored only once"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN TRANSACTION;")
+            # The order of the rows is the same of the memory-cache, from the least recently used
+            cursor.execute('SELECT bucket, identifier, value, compression, expires, version FROM cache_snapshot '
+                           'ORDER BY rowid')
+            rows = cursor.fetchall()
+            cursor.execute('DELETE FROM cache_snapshot')
+            cursor.execute("COMMIT;")
+            return rows
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            if self.conn.in_transaction:
+                cursor.execute("ROLLBACK;")
+            raise DBSQLiteError from exc
+
+    def _save_snapshot(self):
+        """Save the data of the listings buckets, to be restored at the next service start"""
+        timestamp = int(time())
+        entries = []
+        with self.memory_mutex:
+            for bucket in cache_utils.BUCKETS:
+                if bucket['name'] not in cache_utils.SNAPSHOT_BUCKET_NAMES or bucket['name'] not in self.memory_cache:
+                    continue
+                entries.extend((bucket['name'], identifier, cache_entry)
+                               for identifier, cache_entry in self.memory_cache[bucket['name']].items()
+                               if cache_entry['expires'] + bucket['stale_grace_period'] >= timestamp)
+        rows_data = []
+        for bucket_name, identifier, cache_entry in entries:
+            data = cache_entry['data']
+            if bucket_name in cache_utils.LIVE_OBJECT_BUCKET_NAMES:
+                data = cache_utils.serialize_data(data)
+            value, compression = cache_utils.compress_data(data, level=SNAPSHOT_COMPRESSION_LEVEL)
+            rows_data.append((bucket_name, identifier, value, compression, cache_entry['expires'], G.VERSION))
+        self._save_snapshot_db(rows_data)
+        LOG.debug('Saved {} entries to the cache snapshot', len(rows_data))
+
+    @cache_utils.handle_connection
+    def _save_snapshot_db(self, rows_data):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("BEGIN TRANSACTION;")
+            cursor.execute('DELETE FROM cache_snapshot')
+            query = ('INSERT INTO cache_snapshot (bucket, identifier, value, compression, expires, version) '
+                     'VALUES(?, ?, ?, ?, ?, ?)')
+            cursor.executemany(query, rows_data)
+            cursor.execute("COMMIT;")
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            if self.conn.in_transaction:
+                cursor.execute("ROLLBACK;")
+            raise DBSQLiteError from exc
+
+    def shutdown(self):
+        """
+        Stop the write-behind thread, the pending rows will be written to the database,
+        and save the snapshot of the listings buckets
+        """
+        self.db_writer_stop = True
+        self.db_writer_event.set()
+        self.db_writer_thread.join()
+        try:
+            self._save_snapshot()
+        except (DBSQLiteConnectionError, DBSQLiteError):
+            pass
 
     def delete(self, bucket, identifier, including_suffixes=False):
         """
@@ -266,35 +814,35 @@ class CacheManagement:
         """
         # Delete the item data from in memory-cache
         try:
-            identifier = self._add_prefix(identifier)
-            bucket_data = self._get_cache_bucket(bucket['name'])
+            identifier = self._add_prefix(bucket, identifier)
+            self._get_cache_bucket(bucket['name'])
             if including_suffixes:
-                keys_to_delete = [key_identifier for key_identifier in bucket_data.keys()
-                                  if key_identifier.startswith(identifier)]
+                keys_to_delete = self._find_identifiers(bucket['name'], identifier)
             else:
                 keys_to_delete = [identifier]
             for key_identifier in keys_to_delete:
-                try:
-                    del bucket_data[key_identifier]
-                except KeyError:
-                    pass
+                self._remove_entry(bucket['name'], key_identifier)
             if bucket['is_persistent']:
                 # Delete the item data from cache database
-                self._delete_db(bucket['name'], identifier, including_suffixes)
+                with self.db_write_mutex:
+                    self._remove_pending_db_writes(bucket['name'], identifier, including_suffixes)
+                    self._delete_db(bucket['name'], identifier, including_suffixes)
         except DBProfilesMissing:
             # Raised by _add_prefix there is no active profile guid when add-on is installed from scratch
             pass
 
-    @handle_connection
+    @cache_utils.handle_connection
     def _delete_db(self, bucket_name, identifier, including_suffixes):
         try:
             cursor = self.conn.cursor()
             if including_suffixes:
-                identifier += '%'
-                query = 'DELETE FROM cache_data WHERE bucket = ? AND identifier LIKE ?'
+                # Use a range of values instead of LIKE operator, so the primary key index (bucket, identifier)
+                # will be used to find the rows, note also that LIKE would treat '_' chars as wildcard
+                query = 'DELETE FROM cache_data WHERE bucket = ? AND identifier >= ? AND identifier < ?'
+                cursor.execute(query, (bucket_name, identifier, _get_prefix_upper_bound(identifier)))
             else:
                 query = 'DELETE FROM cache_data WHERE bucket = ? AND identifier = ?'
-            cursor.execute(query, (bucket_name, identifier))
+                cursor.execute(query, (bucket_name, identifier))
         except sql.Error as exc:
             LOG.error('SQLite error {}:', exc.args[0])
             raise DBSQLiteError from exc
@@ -309,65 +857,139 @@ class CacheManagement:
         LOG.debug('Performing cache clearing')
         if buckets is None:
             # Clear all cache
-            self.memory_cache = {}
+            with self.memory_mutex:
+                self.memory_cache = {}
+                self.memory_cache_size = {}
+                self.memory_cache_keys = {}
+                self.memory_cache_expiry = {}
             if clear_database:
-                self._clear_db()
+                with self.db_write_mutex:
+                    self._remove_pending_db_writes()
+                    self._clear_db()
         else:
             # Clear only specified buckets
             for bucket in buckets:
-                if bucket['name'] in self.memory_cache:
-                    del self.memory_cache[bucket['name']]
+                with self.memory_mutex:
+                    self.memory_cache.pop(bucket['name'], None)
+                    self.memory_cache_size.pop(bucket['name'], None)
+                    self.memory_cache_keys.pop(bucket['name'], None)
+                    self.memory_cache_expiry.pop(bucket['name'], None)
                 if clear_database:
-                    self._clear_db(bucket)
+                    with self.db_write_mutex:
+                        self._remove_pending_db_writes(bucket['name'])
+                        self._clear_db(bucket)
+
+    def _remove_pending_db_writes(self, bucket_name=None, identifier=None, including_suffixes=False):
+        """Remove the pending rows to be written to the database, if not specified remove all rows"""
+        with self.pending_db_writes_mutex:
+            if bucket_name is None:
+                self.pending_db_writes = {}
+                return
+            if identifier is None or including_suffixes:
+                keys_to_delete = [key for key in self.pending_db_writes
+                                  if key[0] == bucket_name and key[1].startswith(identifier or '')]
+            else:
+                keys_to_delete = [(bucket_name, identifier)]
+            for key in keys_to_delete:
+                self.pending_db_writes.pop(key, None)
 
-    @handle_connection
+    @cache_utils.handle_connection
     def _clear_db(self, bucket=None):
         try:
             cursor = self.conn.cursor()
             if bucket is None:
-                query = 'DELETE FROM cache_data'
-                cursor.execute(query)
+                cursor.execute('DELETE FROM cache_data')
+                cursor.execute('DELETE FROM cache_content')
             else:
-                query = 'DELETE FROM cache_data WHERE bucket = ?'
-                cursor.execute(query, (bucket['name'], ))
+                cursor.execute('DELETE FROM cache_data WHERE bucket = ?', (bucket['name'], ))
+                cursor.execute(DB_DELETE_UNUSED_CONTENT, (-1, ))
         except sql.Error as exc:
             LOG.error('SQLite error {}:', exc.args[0])
             raise DBSQLiteError from exc
 
     def delete_expired(self):
-        bucket_names_db = []
+        """Delete all the expired cache entries"""
+        self._delete_expired_memory()
+        while self._delete_expired_db(CLEANING_MAX_DB_ROWS) == CLEANING_MAX_DB_ROWS:
+            pass
+
+    def _delete_expired_memory(self, max_entries=None):
+        """Delete the expired entries from memory-cache (the expired data is kept until the grace period is elapsed)"""
+        timestamp = int(time())
+        count = 0
+        with self.memory_mutex:
+            for bucket_name, expiry_heap in self.memory_cache_expiry.items():
+                bucket_content = self.memory_cache[bucket_name]
+                grace_period = self.buckets_limits[bucket_name][2]
+                while expiry_heap and expiry_heap[0][0] + grace_period < timestamp:
+                    if max_entries is not None and count >= max_entries:
+                        return
+                    expires, identifier = heappop(expiry_heap)
+                    count += 1
+                    # The heap items of the entries deleted or updated in the meantime are ignored
+                    cache_entry = bucket_content.get(identifier)
+                    if cache_entry and cache_entry['expires'] == expires:
+                        self._pop_entry(bucket_name, identifier)
+                        self.stats[bucket_name]['expirations'] += 1
+                if len(expiry_heap) > 2 * len(bucket_content) + CLEANING_MAX_MEMORY_ENTRIES:
+                    # Too many heap items of deleted or updated entries, rebuild the heap
+                    expiry_heap[:] = [(cache_entry['expires'], identifier)
+                                      for identifier, cache_entry in bucket_content.items()]
+                    heapify(expiry_heap)
+
+    @cache_utils.handle_connection
+    def _delete_expired_db(self, max_rows):
+        """Delete the expired rows from the database, return the number of deleted rows"""
         timestamp = time()
-        for bucket in cache_utils.BUCKETS:
-            if bucket['is_persistent']:
-                bucket_names_db.append(bucket['name'])
-            bucket_content = self._get_cache_bucket(bucket['name'])
-            for identifier, cache_entry in list(bucket_content.items()):
-                if cache_entry['expires'] < timestamp:
-                    try:
-                        del bucket_content[identifier]
-                    except KeyError:
-                        pass
-        if bucket_names_db:
-            self._delete_expired_db(bucket_names_db, timestamp)
-
-    @handle_connection
-    def _delete_expired_db(self, bucket_names, timestamp):
-        query = 'DELETE FROM cache_data WHERE ('
-        query += ' OR '.join(['bucket = ?'] * len(bucket_names))
-        query += ') AND expires < ?'
-        bucket_names.append(timestamp)
+        deleted_rows = 0
+        query = ('DELETE FROM cache_data WHERE rowid IN '
+                 '(SELECT rowid FROM cache_data WHERE expires < ? AND bucket = ? LIMIT ?)')
+        try:
+            cursor = self.conn.cursor()
+            for bucket in cache_utils.BUCKETS:
+                if not bucket['is_persistent']:
+                    continue
+                cursor.execute(query, (timestamp - bucket['stale_grace_period'], bucket['name'],
+                                       max_rows - deleted_rows))
+                deleted_rows += cursor.rowcount
+                if deleted_rows >= max_rows:
+                    break
+            # The content no longer referenced, of the deleted rows or of the rows updated with new content
+            cursor.execute(DB_DELETE_UNUSED_CONTENT, (max_rows, ))
+            if deleted_rows or cursor.rowcount:
+                LOG.debug('Deleted {} expired rows from the cache database', deleted_rows)
+                # With 'execute' the pragma release only one page, 'executescript' runs it until completion
+                cursor.executescript(f'PRAGMA incremental_vacuum({VACUUM_MAX_PAGES});')
+            return deleted_rows
+        except sql.Error as exc:
+            LOG.error('SQLite error {}:', exc.args[0])
+            raise DBSQLiteError from exc
+
+    def _convert_db_auto_vacuum(self):
+        """
+        Convert (one-time) a database created without 'auto_vacuum' (thread), the VACUUM rewrites the whole
+        database file and blocks the writers until completion, so it is not executed in the service tick
+        """
+        LOG.debug('Converting the cache database to incremental auto vacuum')
+        try:
+            self._vacuum_db()
+        except DBSQLiteError:
+            pass
+        finally:
+            self.conn.close()
+            self.local_storage.conn = None
+
+    @cache_utils.handle_connection
+    def _vacuum_db(self):
         try:
             cursor = self.conn.cursor()
-            cursor.execute(query, bucket_names)
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
         except sql.Error as exc:
             LOG.error('SQLite error {}:', exc.args[0])
             raise DBSQLiteError from exc
 
 
-def _compute_next_schedule():
-    last_run = G.LOCAL_DB.get_value('clean_cache_last_start', data_type=datetime)
-    if last_run is None:
-        last_run = datetime.now()
-        G.LOCAL_DB.set_value('clean_cache_last_start', last_run)
-    next_run = last_run + timedelta(days=15)
-    return next_run
+def _get_prefix_upper_bound(identifier_prefix):
+    """Get the lowest string value that is greater than all the strings starting with the specified prefix"""
+    return identifier_prefix[:-1] + chr(ord(identifier_prefix[-1]) + 1)
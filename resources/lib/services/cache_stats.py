@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2020 Stefano Gottardo (original implementation module)
+    Statistics of the cache usage
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+from bisect import bisect_left
+
+# The counters of the operations, by bucket
+STATS_COUNTERS = ['hits', 'db_hits', 'misses', 'adds', 'added_bytes', 'evictions', 'expirations']
+# The time-consuming operations, the durations are counted by LatencyHistogram
+STATS_LATENCIES = ['serialize', 'deserialize', 'db_read', 'db_write']
+
+
+class LatencyHistogram:
+    """Count the durations of an operation by ranges of time"""
+    # Upper bounds of the ranges in milliseconds
+    RANGES_MS = [0.1, 0.5, 1, 5, 10, 50, 100]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.RANGES_MS) + 1)
+        self.total_time = 0.0
+
+    def add(self, duration):
+        """Add a duration in seconds"""
+        self.counts[bisect_left(self.RANGES_MS, duration * 1000)] += 1
+        self.total_time += duration
+
+    def get_stats(self):
+        """Get the number of operations, the average duration and the count by range of time"""
+        count = sum(self.counts)
+        ranges = [f'<{range_ms}ms' for range_ms in self.RANGES_MS] + [f'>={self.RANGES_MS[-1]}ms']
+        return {
+            'count': count,
+            'avg_ms': self.total_time * 1000 / count if count else 0,
+            'ranges': dict(zip(ranges, self.counts))
+        }
@@ -7,24 +7,59 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import os
 import pickle
+import queue
+import selectors
+import socket
+import threading
 from http.server import BaseHTTPRequestHandler
-from socketserver import TCPServer, ThreadingMixIn
+from socketserver import TCPServer
+from time import monotonic
 from urllib.parse import urlparse, parse_qs, unquote
 
-from resources.lib.common import IPC_ENDPOINT_CACHE, IPC_ENDPOINT_NFSESSION, IPC_ENDPOINT_MSL, IPC_ENDPOINT_NFSESSION_TEST
+from resources.lib.common import (IPC_ENDPOINT_CACHE, IPC_ENDPOINT_NFSESSION, IPC_ENDPOINT_NFSESSION_BATCH,
+                                  IPC_ENDPOINT_MSL, IPC_ENDPOINT_NFSESSION_TEST)
 from resources.lib.common.exceptions import InvalidPathError, CacheMiss, MetadataNotAvailable, SlotNotImplemented
 from resources.lib.globals import G
 from resources.lib.services.nfsession.nfsession import NetflixSession
 from resources.lib.utils.logging import LOG
 
+KEEP_ALIVE_TIMEOUT_SECS = 30
+# Number of worker threads of each server, and max number of accepted connections waiting for a worker
+SERVER_POOL_SIZE = 6
+SERVER_POOL_QUEUE_SIZE = 32
+# Max time to wait for the workers to end the requests in progress, when the server is closed
+SERVER_CLOSE_TIMEOUT_SECS = 2
+
+# The servers with a pool of worker threads currently open, to get their statistics
+_POOL_SERVERS = []
+
 
 class NetflixHttpRequestHandler(BaseHTTPRequestHandler):
     """Handles and translates requests from IPC via HTTP"""
+    # Keep the connections alive, so the add-on frontend can reuse the same connection for multiple IPC calls,
+    # therefore every response must specify the Content-Length header
+    protocol_version = 'HTTP/1.1'
+    # Timeout (in seconds) of the socket operations
+    timeout = KEEP_ALIVE_TIMEOUT_SECS
+    # Headers and body are written separately, on a kept alive connection the Nagle algorithm
+    # combined with the delayed ACK would delay each response
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        """Handle a single request, a kept alive connection is given back to the server to wait the next request"""
+        # Note: a client that sends pipelined requests is not supported, the pending data read in the buffer
+        # of the current rfile would be lost, the add-on frontend and InputStream Adaptive do not pipeline requests
+        self.close_connection = True
+        self.handle_one_request()
+
     # pylint: disable=invalid-name
     def do_HEAD(self):
         """Answers head requests with a success code"""
         self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
 
     def do_GET(self):
         LOG.debug('HTTP Server: received GET request {}', self.path)
@@ -35,7 +70,6 @@ class NetflixHttpRequestHandler(BaseHTTPRequestHandler):
             handle_msl_request(self, func_name, None, params)
         else:
             self.send_error(404, 'Not found')
-            self.end_headers()
 
     def do_POST(self):
         LOG.debug('HTTP Server: received POST request {}', self.path)
@@ -49,20 +83,204 @@ class NetflixHttpRequestHandler(BaseHTTPRequestHandler):
             handle_cache_request(self, func_name, data)
         elif endpoint == IPC_ENDPOINT_NFSESSION:
             handle_request(self, self.server.netflix_session, func_name, data)
+        elif endpoint == IPC_ENDPOINT_NFSESSION_BATCH:
+            handle_batch_request(self, self.server.netflix_session, data)
         elif endpoint == IPC_ENDPOINT_NFSESSION_TEST and LOG.is_enabled:
             handle_request_test(self, self.server.netflix_session, func_name, data)
         else:
             self.send_error(404, 'Not found')
-            self.end_headers()
 
     def log_message(self, *args):  # pylint: disable=arguments-differ
         """Disable the BaseHTTPServer Log"""
 
 
-class NFThreadedTCPServer(ThreadingMixIn, TCPServer):
-    """Handle each request in a separate thread"""
-    def __init__(self, server_address):
-        ThreadingMixIn.__init__(self)
+class NetflixUnixHttpRequestHandler(NetflixHttpRequestHandler):
+    """Handles and translates requests from IPC via HTTP over a Unix domain socket"""
+    # TCP_NODELAY option can not be set to a Unix domain socket
+    disable_nagle_algorithm = False
+
+    def address_string(self):
+        return 'unix-socket'
+
+
+class ThreadPoolMixIn:
+    """
+    Mix-in class to handle the requests with a bounded pool of worker threads.
+    The accepted connections wait in a bounded queue for a free worker, when the queue is full the server
+    stops to accept new connections. An idle kept alive connection does not hold a worker,
+    it is watched by a separate thread and queued again when the next request arrives.
+    """
+    pool_size = SERVER_POOL_SIZE
+    pool_queue_size = SERVER_POOL_QUEUE_SIZE
+    keep_alive_timeout = KEEP_ALIVE_TIMEOUT_SECS
+
+    def __init__(self, pool_size=None, pool_queue_size=None):
+        if pool_size:
+            self.pool_size = pool_size
+        if pool_queue_size:
+            self.pool_queue_size = pool_queue_size
+        self._requests_queue = queue.Queue(self.pool_queue_size)
+        self._threads = []
+        self._is_pool_closed = False
+        # Connections owned by the server, to close them with the server
+        self._connections = set()
+        # Kept alive connections given back by the workers, to be registered by the idle connections watcher
+        self._idle_pending = []
+        self._idle_pending_lock = threading.Lock()
+        # Socket pair to wake up the idle connections watcher, created when the server is activated
+        self._wakeup_recv = None
+        self._wakeup_send = None
+        # Instrumentation
+        self._stats_lock = threading.Lock()
+        self._busy_workers = 0
+        self._queue_depth_max = 0
+
+    def server_activate(self):
+        # Called by the base class __init__ only when the socket has been bound, so when the server fails to start
+        # there are no sockets to be closed and the server is not registered
+        super().server_activate()  # pylint: disable=no-member
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        _POOL_SERVERS.append(self)
+
+    def get_pool_stats(self):
+        """Get the current status of the worker pool"""
+        return {
+            'pool_size': self.pool_size,
+            'busy_workers': self._busy_workers,
+            'queue_depth': self._requests_queue.qsize(),
+            'queue_depth_max': self._queue_depth_max,
+            'idle_connections': len(self._connections) - self._busy_workers - self._requests_queue.qsize()
+        }
+
+    def process_request(self, request, client_address):
+        """Queue the request to be processed by a worker thread"""
+        if not self._threads:
+            self._start_threads()
+        self._connections.add(request)
+        self._queue_request(request, client_address)
+
+    def _queue_request(self, request, client_address):
+        if self._is_pool_closed:
+            self.shutdown_request(request)
+            return
+        self._requests_queue.put((request, client_address))
+        queue_depth = self._requests_queue.qsize()
+        if queue_depth > self._queue_depth_max:
+            self._queue_depth_max = queue_depth
+            if queue_depth > 1:
+                LOG.debug('[{}] Max depth of the requests queue increased to {}',
+                          self.__class__.__name__, queue_depth)
+
+    def _start_threads(self):
+        for _ in range(self.pool_size):
+            thread = threading.Thread(target=self._process_requests_worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._watch_idle_connections, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _process_requests_worker(self):
+        while True:
+            item = self._requests_queue.get()
+            if item is None:
+                break
+            request, client_address = item
+            with self._stats_lock:
+                self._busy_workers += 1
+            keep_alive = False
+            try:
+                handler = self.RequestHandlerClass(request, client_address, self)  # pylint: disable=no-member
+                keep_alive = not getattr(handler, 'close_connection', True)
+            except Exception:  # pylint: disable=broad-except
+                self.handle_error(request, client_address)  # pylint: disable=no-member
+            finally:
+                with self._stats_lock:
+                    self._busy_workers -= 1
+            if keep_alive and not self._is_pool_closed:
+                with self._idle_pending_lock:
+                    self._idle_pending.append((request, client_address))
+                try:
+                    self._wakeup_send.send(b'\x00')
+                except OSError:  # The server has been closed in the meantime
+                    self.shutdown_request(request)
+            else:
+                self.shutdown_request(request)
+
+    def _watch_idle_connections(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_recv, selectors.EVENT_READ)
+        while not self._is_pool_closed:
+            for key, _ in selector.select(timeout=1):
+                if key.fileobj is self._wakeup_recv:
+                    self._wakeup_recv.recv(1024)
+                    continue
+                # A new request is arrived (or the client has closed the connection)
+                selector.unregister(key.fileobj)
+                self._queue_request(key.fileobj, key.data[0])
+            with self._idle_pending_lock:
+                idle_pending, self._idle_pending = self._idle_pending, []
+            for request, client_address in idle_pending:
+                selector.register(request, selectors.EVENT_READ, (client_address, monotonic()))
+            # Close the connections that have been idle for too long
+            expiry_time = monotonic() - self.keep_alive_timeout
+            for key in list(selector.get_map().values()):
+                if key.data and key.data[1] < expiry_time:
+                    selector.unregister(key.fileobj)
+                    self.shutdown_request(key.fileobj)
+        selector.close()
+
+    def shutdown_request(self, request):
+        self._connections.discard(request)
+        super().shutdown_request(request)  # pylint: disable=no-member
+
+    def server_close(self):
+        super().server_close()  # pylint: disable=no-member
+        if self._wakeup_send is None or self._is_pool_closed:
+            # The server has not been activated (failed to start) or is already closed
+            return
+        self._is_pool_closed = True
+        self._wakeup_send.send(b'\x00')
+        # Close all connections, this also releases the workers that are reading a request
+        for connection in list(self._connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # Remove the queued connections (already closed), then queue a stop item for each worker,
+        # the queue may have been filled again in the meantime, so the put must not block
+        while self._discard_queued_request():
+            pass
+        workers = self._threads[:-1]
+        for _ in workers:
+            while True:
+                try:
+                    self._requests_queue.put_nowait(None)
+                    break
+                except queue.Full:
+                    self._discard_queued_request()
+        deadline = monotonic() + SERVER_CLOSE_TIMEOUT_SECS
+        for thread in self._threads:  # The workers and the idle connections watcher
+            thread.join(max(deadline - monotonic(), 0))
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+        _POOL_SERVERS.remove(self)
+
+    def _discard_queued_request(self):
+        """Remove a connection from the requests queue, return False if the queue is empty"""
+        try:
+            item = self._requests_queue.get_nowait()
+        except queue.Empty:
+            return False
+        if item is not None:
+            self.shutdown_request(item[0])
+        return True
+
+
+class NFThreadedTCPServer(ThreadPoolMixIn, TCPServer):
+    """Handle the requests with a pool of worker threads"""
+    def __init__(self, server_address, pool_size=None):
+        ThreadPoolMixIn.__init__(self, pool_size)
         TCPServer.__init__(self, server_address, NetflixHttpRequestHandler)
         # Define shared members
         self.netflix_session = NetflixSession()
@@ -73,75 +291,121 @@ class NFThreadedTCPServer(ThreadingMixIn, TCPServer):
             self.netflix_session.nfsession.session.close()
 
 
+if hasattr(socket, 'AF_UNIX'):
+    from socketserver import UnixStreamServer  # pylint: disable=ungrouped-imports
+
+    class NFThreadedUnixServer(ThreadPoolMixIn, UnixStreamServer):
+        """
+        Handle the requests with a pool of worker threads, over a Unix domain socket
+        (used only by the add-on frontend for IPC, InputStream Adaptive always use the TCP server)
+        """
+        def __init__(self, socket_path, netflix_session, pool_size=None):
+            if os.path.exists(socket_path):
+                # Leftover of a service that has not been stopped correctly
+                os.remove(socket_path)
+            ThreadPoolMixIn.__init__(self, pool_size)
+            UnixStreamServer.__init__(self, socket_path, NetflixUnixHttpRequestHandler)
+            # Define shared members
+            self.netflix_session = netflix_session
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.remove(self.server_address)
+            except OSError:
+                pass
+
+
 def handle_msl_request(server, func_name, data, params=None):
     if func_name == 'get_license':
         # Proxy for InputStream Adaptive to get the licence for the requested video
         license_data = server.server.netflix_session.msl_handler.get_license(data)
-        server.send_response(200)
-        server.end_headers()
-        server.wfile.write(license_data)
+        _send_response(server, license_data)
     elif func_name == 'get_manifest':
         # Proxy for InputStream Adaptive to get the XML manifest for the requested video
         videoid = int(params['videoid'][0])
         challenge = server.headers.get('challengeB64', '')
         sid = server.headers.get('sessionId', '')
         manifest_data = server.server.netflix_session.msl_handler.get_manifest(videoid, unquote(challenge), sid)
-        server.send_response(200)
-        server.send_header('Content-type', 'application/dash+xml')
-        server.end_headers()
-        server.wfile.write(manifest_data)
+        _send_response(server, manifest_data, 'application/dash+xml')
     else:
         handle_request(server, server.server.netflix_session, func_name, data)
 
 
 def handle_request(server, handler, func_name, data):
-    server.send_response(200)
-    server.end_headers()
     try:
-        try:
-            func = handler.http_ipc_slots[func_name]
-        except KeyError as exc:
-            raise SlotNotImplemented(f'The specified IPC slot {func_name} does not exist') from exc
-        ret_data = _call_func(func, pickle.loads(data))
+        ret_data = _call_func(_get_slot(handler, func_name), pickle.loads(data))
     except Exception as exc:  # pylint: disable=broad-except
-        if not isinstance(exc, (CacheMiss, MetadataNotAvailable)):
-            LOG.error('IPC callback raised exception: {exc}', exc=exc)
-            import traceback
-            LOG.error(traceback.format_exc())
+        _log_exception(exc)
         ret_data = exc
-    if ret_data is not None:
-        server.wfile.write(pickle.dumps(ret_data, protocol=pickle.HIGHEST_PROTOCOL))
+    _send_response(server, pickle.dumps(ret_data, protocol=pickle.HIGHEST_PROTOCOL) if ret_data is not None else b'')
 
 
 def handle_cache_request(server, func_name, data):
-    server.send_response(200)
-    server.end_headers()
     try:
         ret_data = _call_instance_func(G.CACHE_MANAGEMENT, func_name, pickle.loads(data))
+        if func_name == 'get_stats':
+            ret_data['servers_pool'] = get_servers_pool_stats()
+    except Exception as exc:  # pylint: disable=broad-except
+        _log_exception(exc)
+        ret_data = exc
+    _send_response(server, pickle.dumps(ret_data, protocol=pickle.HIGHEST_PROTOCOL) if ret_data is not None else b'')
+
+
+def get_servers_pool_stats():
+    """Get the current status of the worker pool of each open server"""
+    return {server.__class__.__name__: server.get_pool_stats() for server in _POOL_SERVERS}
+
+
+def handle_batch_request(server, handler, data):
+    """Execute an ordered list of calls (func_name, data, endpoint) and return the list of results"""
+    ret_data = []
+    try:
+        for func_name, call_data, endpoint in pickle.loads(data):
+            try:
+                if endpoint == IPC_ENDPOINT_CACHE:
+                    ret_data.append(_call_instance_func(G.CACHE_MANAGEMENT, func_name, call_data))
+                else:
+                    ret_data.append(_call_func(_get_slot(handler, func_name), call_data))
+            except Exception as exc:  # pylint: disable=broad-except
+                _log_exception(exc)
+                ret_data.append(exc)
     except Exception as exc:  # pylint: disable=broad-except
-        if not isinstance(exc, (CacheMiss, MetadataNotAvailable)):
-            LOG.error('IPC callback raised exception: {exc}', exc=exc)
-            import traceback
-            LOG.error(traceback.format_exc())
+        _log_exception(exc)
         ret_data = exc
-    if ret_data is not None:
-        server.wfile.write(pickle.dumps(ret_data, protocol=pickle.HIGHEST_PROTOCOL))
+    _send_response(server, pickle.dumps(ret_data, protocol=pickle.HIGHEST_PROTOCOL))
 
 
 def handle_request_test(server, handler, func_name, data):
-    server.send_response(200)
-    server.end_headers()
     import json
     try:
-        try:
-            func = handler.http_ipc_slots[func_name]
-        except KeyError as exc:
-            raise SlotNotImplemented(f'The specified IPC slot {func_name} does not exist') from exc
-        ret_data = _call_func(func, json.loads(data))
+        ret_data = _call_func(_get_slot(handler, func_name), json.loads(data))
     except Exception as exc:  # pylint: disable=broad-except
         ret_data = f'The request has failed, error: {exc}'
-    if ret_data:
-        server.wfile.write(json.dumps(ret_data).encode('utf-8'))
+    _send_response(server, json.dumps(ret_data).encode('utf-8') if ret_data else b'')
+
+
+def _send_response(server, data, content_type=None):
+    server.send_response(200)
+    if content_type:
+        server.send_header('Content-type', content_type)
+    server.send_header('Content-Length', str(len(data)))
+    server.end_headers()
+    server.wfile.write(data)
+
+
+def _log_exception(exc):
+    if not isinstance(exc, (CacheMiss, MetadataNotAvailable)):
+        LOG.error('IPC callback raised exception: {exc}', exc=exc)
+        import traceback
+        LOG.error(traceback.format_exc())
+
+
+def _get_slot(handler, func_name):
+    try:
+        return handler.http_ipc_slots[func_name]
+    except KeyError as exc:
+        raise SlotNotImplemented(f'The specified IPC slot {func_name} does not exist') from exc
 
 
 def _call_instance_func(instance, func_name, data):
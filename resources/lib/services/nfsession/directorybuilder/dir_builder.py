@@ -7,6 +7,8 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import copy
+
 from resources.lib.utils.data_types import merge_data_type
 from resources.lib.common.exceptions import CacheMiss
 from resources.lib.common import VideoId
@@ -165,7 +167,8 @@ class DirectoryBuilder(DirectoryPathRequests):
     def add_videoids_to_video_list_cache(self, cache_bucket, cache_identifier, video_ids):
         """Add the specified video ids to a video list datatype in the cache (only if the cache item exists)"""
         try:
-            video_list_sorted_data = G.CACHE.get(cache_bucket, cache_identifier)
+            # The cached object is shared (see LIVE_OBJECT_BUCKET_NAMES), then modify a copy
+            video_list_sorted_data = copy.deepcopy(G.CACHE.get(cache_bucket, cache_identifier))
             merge_data_type(video_list_sorted_data, self.req_datatype_video_list_byid(video_ids))
             G.CACHE.add(cache_bucket, cache_identifier, video_list_sorted_data)
         except CacheMiss:
@@ -15,7 +15,8 @@ from resources.lib.database.db_utils import (TABLE_MENU_DATA)
 from resources.lib.globals import G
 from resources.lib.kodi.context_menu import (generate_context_menu_items, generate_context_menu_profile,
                                              generate_context_menu_remind_me)
-from resources.lib.kodi.infolabels import get_color_name, set_watched_status, add_info_list_item, get_video_codec_hint
+from resources.lib.kodi.infolabels import (get_color_name, set_watched_status, add_info_list_item, get_video_codec_hint,
+                                           prefetch_info_art, save_info_art)
 from resources.lib.services.nfsession.directorybuilder.dir_builder_utils import (get_param_watched_status_by_profile,
                                                                                  add_items_previous_next_page,
                                                                                  get_availability_message)
@@ -132,8 +133,11 @@ def _create_profile_item(profile_guid, is_selected, is_autoselect, is_autoselect
 def build_season_listing(season_list, tvshowid, pathitems=None):
     """Build a season listing"""
     common_data = get_common_data()
+    prefetch_info_art([tvshowid.derive_season(seasonid_value) for seasonid_value in season_list.seasons],
+                      common_data)
     directory_items = [_create_season_item(tvshowid, seasonid_value, season, season_list, common_data)
                        for seasonid_value, season in season_list.seasons.items()]
+    save_info_art(common_data)
     # add_items_previous_next_page use the new value of perpetual_range_selector
     add_items_previous_next_page(directory_items, pathitems, season_list.perpetual_range_selector, tvshowid)
     G.CACHE_MANAGEMENT.execute_pending_db_ops()
@@ -157,10 +161,12 @@ def build_episode_listing(episodes_list, seasonid, pathitems=None):
     common_data['params'] = get_param_watched_status_by_profile()
     common_data['set_watched_status'] = G.ADDON.getSettingBool('sync_watched_status')
     common_data['active_profile_guid'] = G.LOCAL_DB.get_active_profile_guid()
-
+    prefetch_info_art([seasonid.derive_episode(episodeid_value) for episodeid_value in episodes_list.episodes],
+                      common_data)
     directory_items = [_create_episode_item(seasonid, episodeid_value, episode, episodes_list, common_data)
                        for episodeid_value, episode
                        in episodes_list.episodes.items()]
+    save_info_art(common_data)
     # add_items_previous_next_page use the new value of perpetual_range_selector
     add_items_previous_next_page(directory_items, pathitems, episodes_list.perpetual_range_selector)
     G.CACHE_MANAGEMENT.execute_pending_db_ops()
@@ -197,6 +203,7 @@ def build_loco_listing(loco_list, menu_data, force_use_videolist_id=False):
     common_data['menu_data'] = menu_data
     contexts = menu_data.get('loco_contexts')
     items_list = loco_list.lists_by_context(contexts) if contexts else loco_list.lists.items()
+    prefetch_info_art([video_list.videoid for _, video_list in items_list], common_data)
     directory_items = []
     for video_list_id, video_list in items_list:  # pylint: disable=unused-variable
         # Create dynamic sub-menu info in MAIN_MENU_ITEMS
@@ -218,6 +225,7 @@ def build_loco_listing(loco_list, menu_data, force_use_videolist_id=False):
         G.LOCAL_DB.set_value(list_id, sub_menu_data, TABLE_MENU_DATA)
 
         directory_items.append(_create_videolist_item(list_id, video_list, sub_menu_data, common_data))
+    save_info_art(common_data)
     G.CACHE_MANAGEMENT.execute_pending_db_ops()
     return directory_items, {}
 
@@ -264,9 +272,13 @@ def build_video_listing(video_list, menu_data, sub_genre_id=None, pathitems=None
         'trackid': trackid,
         'is_supplemental_type': video_list.__class__.__name__ == 'VideoListSupplemental'
     })
+    prefetch_info_art([_get_video_videoid(videoid_value, video, common_data)
+                       for videoid_value, video in video_list.videos.items()],
+                      common_data)
     directory_items = [_create_video_item(videoid_value, video, video_list, perpetual_range_start, common_data)
                        for videoid_value, video
                        in video_list.videos.items()]
+    save_info_art(common_data)
     # If genre_id exists add possibility to browse LoCo sub-genres
     # With checking if 'previous_start' is existing, we know that it is the first page
     if sub_genre_id and sub_genre_id != 'None' and (not video_list.perpetual_range_selector or 'previous_start' not in video_list.perpetual_range_selector):
@@ -293,13 +305,16 @@ def build_video_listing(video_list, menu_data, sub_genre_id=None, pathitems=None
     return directory_items, {}
 
 
-def _create_video_item(videoid_value, video, video_list, perpetual_range_start, common_data):  # pylint: disable=unused-argument
+def _get_video_videoid(videoid_value, video, common_data):
     if common_data['is_supplemental_type']:
         # 10/10/2022 Broken api? the video trailers are not more identified as supplemental type but as movie type
         # as workaround we check the data type
-        videoid = common.VideoId(supplementalid=videoid_value)
-    else:
-        videoid = common.VideoId.from_videolist_item(video)
+        return common.VideoId(supplementalid=videoid_value)
+    return common.VideoId.from_videolist_item(video)
+
+
+def _create_video_item(videoid_value, video, video_list, perpetual_range_start, common_data):  # pylint: disable=unused-argument
+    videoid = _get_video_videoid(videoid_value, video, common_data)
     is_folder = videoid.mediatype == common.VideoId.SHOW
     is_playable = video['availability'].get('value', {}).get('isPlayable', False)
     is_video_playable = not is_folder and is_playable
@@ -374,8 +389,11 @@ def _create_subgenre_item(video_list_id, subgenre_data, menu_data):
 def build_lolomo_category_listing(lolomo_cat_list, menu_data):
     """Build a folders listing of a LoLoMo category"""
     common_data = get_common_data()
+    lists = list(lolomo_cat_list.lists())
+    prefetch_info_art([video_list.videoid for _, summary_data, video_list in lists if summary_data['length'] > 0],
+                      common_data)
     directory_items = []
-    for list_id, summary_data, video_list in lolomo_cat_list.lists():
+    for list_id, summary_data, video_list in lists:
         if summary_data['length'] == 0:  # Do not show empty lists
             continue
         # Create dynamic sub-menu info in MAIN_MENU_ITEMS
@@ -391,6 +409,7 @@ def build_lolomo_category_listing(lolomo_cat_list, menu_data):
         G.LOCAL_DB.set_value(list_id, sub_menu_data, TABLE_MENU_DATA)
         directory_item = _create_category_item(list_id, video_list, sub_menu_data, common_data, summary_data)
         directory_items.append(directory_item)
+    save_info_art(common_data)
     G.CACHE_MANAGEMENT.execute_pending_db_ops()
     return directory_items, {}
 
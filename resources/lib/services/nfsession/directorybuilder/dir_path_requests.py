@@ -32,7 +32,8 @@ class DirectoryPathRequests:
     def __init__(self, nfsession: 'NFSessionOperations'):
         self.nfsession = nfsession
 
-    @cache_utils.cache_output(cache_utils.CACHE_MYLIST, fixed_identifier='my_list_items', ignore_self_class=True)
+    @cache_utils.cache_output(cache_utils.CACHE_MYLIST, fixed_identifier='my_list_items', ignore_self_class=True,
+                              stale_while_revalidate=True)
     def req_mylist_items(self):
         """Return the 'my list' video list as videoid items"""
         LOG.debug('Requesting "my list" video list as videoid items')
@@ -48,7 +49,8 @@ class DirectoryPathRequests:
         except InvalidVideoListTypeError:
             return []
 
-    @cache_utils.cache_output(cache_utils.CACHE_COMMON, fixed_identifier='loco_list', ignore_self_class=True)
+    @cache_utils.cache_output(cache_utils.CACHE_COMMON, fixed_identifier='loco_list', ignore_self_class=True,
+                              stale_while_revalidate=True)
     def req_loco_list_root(self):
         """Retrieve root LoCo list"""
         # It is used to following cases:
@@ -66,7 +68,8 @@ class DirectoryPathRequests:
         path_response = self.nfsession.path_request(**call_args)
         return LoCo(path_response)
 
-    @cache_utils.cache_output(cache_utils.CACHE_GENRES, identify_from_kwarg_name='genre_id', ignore_self_class=True)
+    @cache_utils.cache_output(cache_utils.CACHE_GENRES, identify_from_kwarg_name='genre_id', ignore_self_class=True,
+                              stale_while_revalidate=True)
     def req_loco_list_genre(self, genre_id):
         """Retrieve LoCo for the given genre"""
         LOG.debug('Requesting LoCo for genre {}', genre_id)
@@ -238,9 +241,11 @@ class DirectoryPathRequests:
         if not any(isinstance(item, list) for item in chunked_video_list):
             raise InvalidVideoListTypeError('The chunked_video_list not contains a list of a list of videoids')
         merged_response = {}
-        for videoids_list in chunked_video_list:
-            path = build_paths(['videos', videoids_list], VIDEO_LIST_PARTIAL_PATHS)
-            path_response = self.nfsession.path_request(path)
+        # The chunks are requested concurrently through the executor shared with the other path requests
+        # (also a list of one chunk), and the responses are merged in the order of the chunks
+        paths_list = [build_paths(['videos', videoids_list], VIDEO_LIST_PARTIAL_PATHS)
+                      for videoids_list in chunked_video_list]
+        for path_response in self.nfsession.path_requests_concurrent(paths_list):
             common.merge_dicts(path_response, merged_response)
 
         if perpetual_range_selector:
@@ -298,10 +303,20 @@ class DirectoryPathRequests:
 
     def req_datatype_video_list_byid(self, video_ids, custom_partial_paths=None):
         """Retrieve a video list which contains the specified by video ids and return a CustomVideoList object"""
+        # Exclude the videos that are known to be not available
+        negative_results = G.CACHE.get_many(cache_utils.CACHE_NEGATIVE,
+                                            [f'videos_{video_id}' for video_id in video_ids])
+        video_ids = [video_id for video_id in video_ids if f'videos_{video_id}' not in negative_results]
+        if not video_ids:
+            return CustomVideoList({})
         LOG.debug('Requesting a video list for {} videos', video_ids)
         paths = build_paths(['videos', video_ids],
                             custom_partial_paths if custom_partial_paths else VIDEO_LIST_PARTIAL_PATHS)
-        path_response = self.nfsession.path_request(paths)
+        path_response = self.nfsession.path_request(paths, use_batching=True)
+        videos = path_response.get('videos', {})
+        for video_id in video_ids:
+            if str(video_id) not in videos:
+                cache_utils.add_negative_result(f'videos_{video_id}')
         return CustomVideoList(path_response)
 
     @cache_utils.cache_output(cache_utils.CACHE_COMMON, fixed_identifier='lolomo_category',
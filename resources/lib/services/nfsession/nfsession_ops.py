@@ -129,6 +129,8 @@ class NFSessionOperations(SessionPathRequests):
 
         G.LOCAL_DB.switch_active_profile(guid)
         G.CACHE_MANAGEMENT.identifier_prefix = guid
+        # The data of the videos can differ between profiles (e.g. the language)
+        self.path_store.clear()
         cookies.save(self.session.cookies)
 
     def parental_control_data(self, guid, password):
@@ -178,10 +180,16 @@ class NFSessionOperations(SessionPathRequests):
         """Retrieve additional metadata for the given VideoId"""
         # Get the parent VideoId (when the 'videoid' is a type of EPISODE/SEASON)
         parent_videoid = videoid.derive_parent(common.VideoId.SHOW)
+        # The identifier of the negative result in the cache, as used by cache_output decorator
+        negative_identifier = f'{cache_utils.CACHE_METADATA["name"]}_{videoid}'
         # Delete the cache if we need to refresh the all metadata
         if refresh:
             G.CACHE.delete(cache_utils.CACHE_METADATA, str(parent_videoid))
+            cache_utils.delete_negative_result(negative_identifier)
+            cache_utils.delete_negative_result(f'{cache_utils.CACHE_METADATA["name"]}_{parent_videoid}')
         if videoid.mediatype == common.VideoId.EPISODE:
+            # Avoid to request again the tv show metadata when it is already known that the episode is not available
+            cache_utils.check_negative_result(negative_identifier)
             try:
                 metadata_data = self._episode_metadata(videoid, parent_videoid)
             except KeyError as exc:
@@ -193,6 +201,7 @@ class NFSessionOperations(SessionPathRequests):
                 except KeyError as exc_:
                     # The new metadata does not contain the episode
                     LOG.error('Episode metadata not found, find_episode_metadata raised an error: {}', exc_)
+                    cache_utils.add_negative_result(negative_identifier, MetadataNotAvailable())
                     raise MetadataNotAvailable from exc_
         else:
             metadata_data = self._metadata(video_id=parent_videoid), None
@@ -205,7 +214,8 @@ class NFSessionOperations(SessionPathRequests):
         episode_metadata, season_metadata = common.find_episode_metadata(episode_videoid, show_metadata)
         return episode_metadata, season_metadata, show_metadata
 
-    @cache_utils.cache_output(cache_utils.CACHE_METADATA, identify_from_kwarg_name='video_id', ignore_self_class=True)
+    @cache_utils.cache_output(cache_utils.CACHE_METADATA, identify_from_kwarg_name='video_id', ignore_self_class=True,
+                              negative_cache_exceptions=(MetadataNotAvailable,))
     def _metadata(self, video_id):
         """Retrieve additional metadata for a video.
         This is a separate method from get_metadata() to work around caching issues
@@ -266,7 +276,7 @@ class NFSessionOperations(SessionPathRequests):
                          build_paths(['videos', int(videoid.tvshowid)], ART_PARTIAL_PATHS + [[['title', 'delivery']]]))
             else:
                 paths = build_paths(['videos', int(videoid.value)], VIDEO_LIST_PARTIAL_PATHS)
-            raw_data = self.path_request(paths)
+            raw_data = self.path_request(paths, use_batching=True)
             infos = get_info(videoid, raw_data['videos'][videoid.value], raw_data, profile_language_code)[0]
             art = get_art(videoid, raw_data['videos'][videoid.value], profile_language_code)
         return infos, art
@@ -280,7 +290,7 @@ class NFSessionOperations(SessionPathRequests):
         #  while the loco root id should be a fixed value (expiry?), the 'continueWatching' context data
         #  will change every time that nfsession update_loco_context is called
         context_name = 'continueWatching'
-        loco_data = self.path_request([['loco', [context_name], ['context', 'id', 'index']]])
+        loco_data = self.path_request([['loco', [context_name], ['context', 'id', 'index']]], use_batching=True)
         loco_root = loco_data['loco']['value'][1]
         _loco_data = {'root_id': loco_root}
         # 22/11/2021 With some users the API path request not provide the "locos" data
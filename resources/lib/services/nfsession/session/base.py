@@ -13,6 +13,7 @@ from typing import TYPE_CHECKING
 import resources.lib.common as common
 from resources.lib.database.db_utils import TABLE_SESSION
 from resources.lib.globals import G
+from resources.lib.services.nfsession.session.path_store import PathStore
 from resources.lib.utils.logging import LOG
 
 if TYPE_CHECKING:  # This variable/imports are used only by the editor, so not at runtime
@@ -31,6 +32,9 @@ class SessionBase:
     msl_handler: 'MSLHandler' = None
     """A reference to the MSL Handler object"""
 
+    path_store: PathStore = None
+    """The local store of the jsonGraph leaves of the videos, used by the path requests"""
+
     def __init__(self):
         self._init_session()
 
@@ -43,6 +47,7 @@ class SessionBase:
             pass
         from requests import Session
         self.session = Session()
+        self.path_store = PathStore()
         self.session.max_redirects = 10  # Too much redirects should means some problem
         self.session.headers.update({
             'User-Agent': common.get_user_agent(enable_android_mediaflag_fix=True),
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2019 Stefano Gottardo - @CastagnaIT
+    Batching of the path requests made by different callers at the same time
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import copy
+import json
+from threading import Event, Lock
+from time import sleep
+
+# Time (in seconds) to wait for other path requests to be added to the batch before sending it
+PATH_REQUEST_BATCH_WINDOW = 0.005
+# Max number of paths sent with a single batch, the server rejects the requests with a too large response
+PATH_REQUEST_BATCH_MAX_PATHS = 40
+
+
+class PathRequestsBatcher:
+    """
+    Collect the path requests that arrive within a short time window and send them with a single path request,
+    then each caller receive only the part of the jsonGraph response related to its own paths
+    """
+
+    def __init__(self, send_func):
+        """
+        :param send_func: the function that send the path request, it takes the paths and returns the jsonGraph data
+        """
+        self._send_func = send_func
+        self._mutex = Lock()
+        self._batch = None
+        self._batch_paths_count = 0
+
+    def execute(self, paths):
+        """Add the paths to a batch and return the jsonGraph data of the response (blocking)"""
+        request = {'paths': paths, 'event': Event(), 'response': None, 'exception': None}
+        with self._mutex:
+            is_batch_sender = (self._batch is None
+                               or self._batch_paths_count + len(paths) > PATH_REQUEST_BATCH_MAX_PATHS)
+            if is_batch_sender:
+                # Open a new batch, the previous one (if any) will be sent by its own sender
+                self._batch = [request]
+                self._batch_paths_count = len(paths)
+            else:
+                self._batch.append(request)
+                self._batch_paths_count += len(paths)
+            batch = self._batch
+        if is_batch_sender:
+            sleep(PATH_REQUEST_BATCH_WINDOW)
+            with self._mutex:
+                if self._batch is batch:
+                    self._batch = None
+            self._send_batch(batch)
+        else:
+            request['event'].wait()
+        exc = request['exception']
+        if isinstance(exc, Exception):
+            raise exc
+        return request['response']
+
+    def _send_batch(self, batch):
+        if len(batch) == 1:
+            try:
+                batch[0]['response'] = self._send_func(batch[0]['paths'])
+            except Exception as exc:  # pylint: disable=broad-except
+                batch[0]['exception'] = exc
+            return
+        # Remove the duplicate paths to reduce the request data
+        merged_paths = list({json.dumps(path): path
+                             for request in batch for path in request['paths']}.values())
+        try:
+            response = self._send_func(merged_paths)
+            for request in batch:
+                request['response'] = pluck_paths(response, request['paths'])
+        except Exception as exc:  # pylint: disable=broad-except
+            for request in batch:
+                request['exception'] = exc
+        finally:
+            for request in batch:
+                request['event'].set()
+
+
+def pluck_paths(graph, paths):
+    """
+    Get from a jsonGraph data only the data of the specified paths,
+    by following the references in the same way of the server
+    """
+    output = {}
+    for path in paths:
+        _pluck_path(graph, output, graph, output, path)
+    return output
+
+
+def _pluck_path(graph, output, node, output_node, path):
+    for key in _expand_keys(path[0]):
+        key = str(key)
+        if key not in node:
+            continue
+        value = node[key]
+        if not isinstance(value, dict) or '$type' in value or len(path) == 1:
+            output_node[key] = copy.deepcopy(value)
+            if isinstance(value, dict) and value.get('$type') == 'ref' and len(path) > 1:
+                # Follow the reference, the remaining keys of the path are applied to the referenced data
+                _pluck_path(graph, output, graph, output, list(value['value']) + path[1:])
+            continue
+        if not isinstance(output_node.get(key), dict):
+            output_node[key] = {}
+        _pluck_path(graph, output, value, output_node[key], path[1:])
+
+
+def _expand_keys(keys):
+    """Get the list of the keys from a path item, that can be a key, a list of keys or a range"""
+    if not isinstance(keys, list):
+        keys = [keys]
+    expanded_keys = []
+    for key in keys:
+        if isinstance(key, dict):
+            range_start = key.get('from', 0)
+            range_end = key['to'] if 'to' in key else range_start + key.get('length', 1) - 1
+            expanded_keys.extend(range(range_start, range_end + 1))
+        else:
+            expanded_keys.append(key)
+    return expanded_keys
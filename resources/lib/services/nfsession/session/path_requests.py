@@ -9,30 +9,77 @@
     See LICENSES/MIT.md for more information.
 """
 import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 
 import resources.lib.utils.api_paths as apipaths
 import resources.lib.common as common
 from resources.lib.globals import G
 from resources.lib.services.nfsession.session.access import SessionAccess
+from resources.lib.services.nfsession.session.path_batcher import PathRequestsBatcher
 from resources.lib.utils.logging import LOG, measure_exec_time_decorator
 
+# Max number of path requests executed at same time by path_requests_concurrent (by all the callers),
+# a low value to not overload the website with too many requests in a short time
+PATH_REQUEST_MAX_WORKERS = 3
+
 
 class SessionPathRequests(SessionAccess):
     """Manages the PATH requests"""
 
+    def __init__(self):
+        super().__init__()
+        self.path_batcher = PathRequestsBatcher(self._post_path_request)
+        # The executor is shared by all the callers, so the limit of the requests executed at same time
+        # is respected also when more lists are loaded at same time (e.g. by the skin widgets)
+        self.path_requests_executor = ThreadPoolExecutor(max_workers=PATH_REQUEST_MAX_WORKERS,
+                                                         thread_name_prefix='PathRequests')
+
     @measure_exec_time_decorator(is_immediate=True)
-    def path_request(self, paths):
-        """Perform a path request against the Shakti API"""
-        LOG.debug('Executing path request: {}', paths)
+    def path_request(self, paths, use_batching=False, serialized_paths=''):
+        """
+        Perform a path request against the Shakti API
+        :param paths: The paths that compose the request
+        :param use_batching: if True, the request can be sent together with the requests of other callers
+                             made at the same time, to be used only for requests with few paths and data
+        :param serialized_paths: other paths already serialized (see render_range_paths) to be added to the request,
+                                 these are sent as they are, so can not be used with batching
+        """
+        # Remove from the paths the leaves already available in the local store
+        paths, store_plan = self.path_store.split_paths(paths)
+        if not paths and not serialized_paths:
+            LOG.debug('Path request fully answered by the local store')
+            return self.path_store.merge_response(store_plan, {})
+        if use_batching:
+            response = self.path_batcher.execute(paths)
+        else:
+            response = self._post_path_request(paths, serialized_paths)
+        return self.path_store.merge_response(store_plan, response)
+
+    def _post_path_request(self, paths, serialized_paths=''):
+        LOG.debug('Executing path request: {} {}', paths, serialized_paths)
         custom_params = {}
-        # Use separators with dumps because Netflix rejects spaces
-        data = 'path=' + '&path='.join(json.dumps(path, separators=(',', ':')) for path in paths)
+        data = '&'.join(filter(None, [apipaths.serialize_paths(paths), serialized_paths]))
         response = self.post_safe(
             endpoint='shakti',
             params=custom_params,
             data=data)
         return response['jsonGraph']
 
+    def path_requests_concurrent(self, paths_list, serialized_paths_list=None):
+        """
+        Perform multiple path requests, up to PATH_REQUEST_MAX_WORKERS requests are executed at same time,
+        the requests of other callers made at same time are queued
+        (not to be called by a path request executed by path_requests_executor, the executor could be saturated)
+        :param paths_list: a list of paths, each item is the paths of a path request
+        :param serialized_paths_list: optional, a list of the serialized paths to be added to each path request
+        :return: the list of the responses, in the same order of the paths
+        """
+        if serialized_paths_list is None:
+            serialized_paths_list = repeat('')
+        return list(self.path_requests_executor.map(self.path_request, paths_list, repeat(False),
+                                                    serialized_paths_list))
+
     @measure_exec_time_decorator(is_immediate=True)
     def perpetual_path_request(self, paths, length_params, perpetual_range_start=None,
                                request_size=apipaths.PATH_REQUEST_SIZE_PAGINATED, no_limit_req=False):
@@ -57,31 +104,43 @@ class SessionPathRequests(SessionAccess):
 
         number_of_requests = 100 if no_limit_req else int(G.ADDON.getSettingInt('page_results') / 45)
         perpetual_range_start = int(perpetual_range_start) if perpetual_range_start else 0
-        range_start = perpetual_range_start
-        range_end = range_start + request_size
+        next_start = perpetual_range_start + response_size * number_of_requests
+        # The ranges of all the requests, where the range end value is included
+        ranges = [(range_start, range_start + request_size)
+                  for range_start in range(perpetual_range_start, next_start, response_size)]
+        # The first request is executed alone, because most lists are completed with it,
+        # then the next requests are executed concurrently in groups
+        ranges_groups = [ranges[:1]] + [ranges[index:index + PATH_REQUEST_MAX_WORKERS]
+                                        for index in range(1, len(ranges), PATH_REQUEST_MAX_WORKERS)]
+        # The paths are the same for all the requests, except for the range selector,
+        # so the paths with the range selector are serialized once
+        static_paths, range_paths_template = apipaths.compile_range_paths(paths)
         merged_response = {}
 
-        for n_req in range(number_of_requests):
-            path_response = self.path_request(_set_range_selector(paths, range_start, range_end))
-            if not path_response:
-                break
-            if not common.check_path_exists(length_args, path_response):
-                # It may happen that the number of items to be received
-                # is equal to the number of the response_size
-                # so a second round will be performed, which will return an empty list
-                break
-            common.merge_dicts(path_response, merged_response)
-            response_count = response_length(path_response, *length_args)
-            if response_count < response_size:
-                # There are no other elements to request
+        for ranges_group in ranges_groups:
+            is_list_completed = False
+            serialized_paths_list = [apipaths.render_range_paths(range_paths_template, *range_values)
+                                     for range_values in ranges_group]
+            # The responses are merged in the order of the ranges
+            for path_response in self.path_requests_concurrent([static_paths] * len(ranges_group),
+                                                               serialized_paths_list):
+                if not path_response or not common.check_path_exists(length_args, path_response):
+                    # It may happen that the number of items to be received
+                    # is equal to the number of the response_size
+                    # so a next request will be performed, which will return an empty list
+                    is_list_completed = True
+                    break
+                common.merge_dicts(path_response, merged_response)
+                response_count = response_length(path_response, *length_args)
+                if response_count < response_size:
+                    # There are no other elements to request, the responses of the next ranges are discarded
+                    is_list_completed = True
+                    break
+            if is_list_completed:
                 break
-
-            range_start += response_size
-            if n_req == (number_of_requests - 1):
-                merged_response['_perpetual_range_selector'] = {'next_start': range_start}
-                LOG.debug('{} has other elements, added _perpetual_range_selector item', response_type)
-            else:
-                range_end = range_start + request_size
+        else:
+            merged_response['_perpetual_range_selector'] = {'next_start': next_start}
+            LOG.debug('{} has other elements, added _perpetual_range_selector item', response_type)
 
         if perpetual_range_start > 0:
             previous_start = perpetual_range_start - (response_size * number_of_requests)
@@ -139,19 +198,3 @@ class SessionPathRequests(SessionAccess):
             params=custom_params,
             data=data)
         return response_data['jsonGraph']
-
-
-def _set_range_selector(paths, range_start, range_end):
-    """
-    Replace the RANGE_PLACEHOLDER with an actual dict:
-    {'from': range_start, 'to': range_end}
-    """
-    from copy import deepcopy
-    # Make a deepcopy because we don't want to lose the original paths with the placeholder
-    ranged_paths = deepcopy(paths)
-    for path in ranged_paths:
-        try:
-            path[path.index(apipaths.RANGE_PLACEHOLDER)] = {'from': range_start, 'to': range_end}
-        except ValueError:
-            pass
-    return ranged_paths
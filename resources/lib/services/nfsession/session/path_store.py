@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2019 Stefano Gottardo - @CastagnaIT
+    Local store of the jsonGraph leaves of the videos, used to answer the path requests partially
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import copy
+from collections import OrderedDict
+from itertools import product
+from threading import Lock
+from time import time
+
+# Max time (in seconds) that a leaf is kept in the store, also when the server allows a longer time
+PATH_STORE_TTL = 1200
+# Max number of videos kept in the store, the least recently used are removed first
+PATH_STORE_MAX_VIDEOS = 2000
+# Keys of the videos with values that can change at any time (e.g. by the user actions),
+# these are always requested to the server
+PATH_STORE_VOLATILE_KEYS = ['requestId', 'queue', 'inRemindMeList', 'bookmarkPosition', 'watched',
+                            'userRating', 'trackIds']
+
+
+class PathStore:
+    """
+    A normalized store of the jsonGraph leaves of the videos ('videos' -> video id -> keys),
+    it allows to remove from the path requests the leaves already known, and to add them back to the response.
+    Only the paths that start with ['videos', video id(s)] and that do not have ranges are handled,
+    a video id is removed from a path only when all the leaves of the path are available for that video.
+    """
+
+    def __init__(self):
+        self._videos = OrderedDict()
+        self._mutex = Lock()
+
+    def clear(self):
+        """Remove all the leaves stored"""
+        with self._mutex:
+            self._videos.clear()
+
+    def split_paths(self, paths):
+        """
+        Remove from the paths the leaves available in the store
+        :param paths: the paths of a path request
+        :return: a tuple with the paths to be requested to the server
+                 and the plan to be passed to the merge_response method
+        """
+        paths_to_request = []
+        stored_leaves = []
+        leaves_to_store = []
+        with self._mutex:
+            for path in paths:
+                if not _is_path_storable(path):
+                    paths_to_request.append(path)
+                    continue
+                video_ids = path[1] if isinstance(path[1], list) else [path[1]]
+                keys = path[2] if isinstance(path[2], list) else [path[2]]
+                volatile_keys = [key for key in keys if key in PATH_STORE_VOLATILE_KEYS]
+                stable_keys = [key for key in keys if key not in PATH_STORE_VOLATILE_KEYS]
+                if volatile_keys:
+                    paths_to_request.append(['videos', path[1], volatile_keys] + path[3:])
+                if not stable_keys:
+                    continue
+                leaves = list(product(stable_keys, *[item if isinstance(item, list) else [item]
+                                                     for item in path[3:]]))
+                missing_video_ids = []
+                for video_id in video_ids:
+                    video_leaves = self._get_video_leaves(str(video_id), leaves)
+                    if video_leaves is None:
+                        missing_video_ids.append(video_id)
+                    else:
+                        stored_leaves.extend(video_leaves)
+                if missing_video_ids:
+                    paths_to_request.append(['videos', missing_video_ids, stable_keys] + path[3:])
+                    leaves_to_store.extend((str(video_id), leaves) for video_id in missing_video_ids)
+        return paths_to_request, (stored_leaves, leaves_to_store)
+
+    def merge_response(self, plan, response):
+        """
+        Save the leaves of the response in the store, then add to the response the leaves taken from the store
+        :param plan: the plan returned by split_paths method
+        :param response: the jsonGraph data of the path request response (the data will be modified)
+        :return: the response
+        """
+        stored_leaves, leaves_to_store = plan
+        videos_data = response.get('videos', {})
+        timestamp = time()
+        with self._mutex:
+            for video_id, leaves in leaves_to_store:
+                if video_id not in videos_data:
+                    continue
+                for leaf in leaves:
+                    self._add_leaf(video_id, leaf, videos_data[video_id], timestamp)
+            while len(self._videos) > PATH_STORE_MAX_VIDEOS:
+                self._videos.popitem(last=False)
+        for video_id, graft_keys, node in stored_leaves:
+            parent = response.setdefault('videos', {}).setdefault(video_id, {})
+            for key in graft_keys[:-1]:
+                parent = parent.setdefault(key, {})
+            # The data received from the server takes precedence
+            parent.setdefault(graft_keys[-1], copy.deepcopy(node))
+        return response
+
+    def _get_video_leaves(self, video_id, leaves):
+        """Get the stored leaves of a video, return None if one of the leaves is not available or expired"""
+        video_leaves = self._videos.get(video_id)
+        if video_leaves is None:
+            return None
+        timestamp = time()
+        result = []
+        for leaf in leaves:
+            stored_leaf = video_leaves.get(leaf)
+            if stored_leaf is None or stored_leaf[2] < timestamp:
+                return None
+            result.append((video_id, stored_leaf[0], stored_leaf[1]))
+        self._videos.move_to_end(video_id)
+        return result
+
+    def _add_leaf(self, video_id, leaf, video_data, timestamp):
+        """Add a leaf of a video by reading the value from the video data of the response"""
+        if not isinstance(video_data, dict) or '$type' in video_data:
+            return
+        node = video_data
+        graft_keys = leaf
+        for index, key in enumerate(leaf):
+            if not isinstance(node, dict) or '$type' in node:
+                break
+            key = str(key)
+            if key not in node:
+                # The leaf is not in the response, so can not be stored
+                return
+            node = node[key]
+            graft_keys = leaf[:index + 1]
+        if isinstance(node, dict) and '$type' in node:
+            if node['$type'] == 'error':
+                return
+            expires = _get_expires(node.get('$expires'), timestamp)
+            if expires is None:
+                return
+        else:
+            expires = timestamp + PATH_STORE_TTL
+        video_leaves = self._videos.setdefault(video_id, {})
+        self._videos.move_to_end(video_id)
+        video_leaves[leaf] = (tuple(str(key) for key in graft_keys), copy.deepcopy(node), expires)
+
+
+def _is_path_storable(path):
+    """Check if a path can be handled by the store, i.e. a path to the keys of one or more videos without ranges"""
+    if len(path) < 3 or path[0] != 'videos':
+        return False
+    return not any(isinstance(item, dict) or (isinstance(item, list) and any(isinstance(sub_item, dict)
+                                                                             for sub_item in item))
+                   for item in path[1:])
+
+
+def _get_expires(sentinel_expires, timestamp):
+    """
+    Get the expiration timestamp (in seconds) of a leaf from the value of the '$expires' key, return None if the
+    leaf must not be stored. The '$expires' value can be: 0 (expired), 1 (never expire),
+    a negative value (relative time in ms), a positive value (absolute time in ms)
+    """
+    max_expires = timestamp + PATH_STORE_TTL
+    if sentinel_expires is None or sentinel_expires == 1:
+        return max_expires
+    if sentinel_expires == 0:
+        return None
+    if sentinel_expires < 0:
+        return min(timestamp - sentinel_expires / 1000, max_expires)
+    expires = sentinel_expires / 1000
+    return min(expires, max_expires) if expires > timestamp else None
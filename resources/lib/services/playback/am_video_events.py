@@ -206,7 +206,7 @@ class AMVideoEvents(ActionManager):
         """Retrieve raw data for specified video id's"""
         video_ids = [int(videoid.value) for videoid in videoids]
         LOG.debug('Requesting video raw data for {}', video_ids)
-        return self.nfsession.path_request(build_paths(['videos', video_ids], EVENT_PATHS))
+        return self.nfsession.path_request(build_paths(['videos', video_ids], EVENT_PATHS), use_batching=True)
 
 
 def _get_manifest(videoid):
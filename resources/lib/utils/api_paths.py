@@ -7,6 +7,8 @@
     SPDX-License-Identifier: MIT
     See LICENSES/MIT.md for more information.
 """
+import json
+
 import resources.lib.common as common
 
 from resources.lib.globals import G
@@ -150,6 +152,32 @@ def build_paths(base_path, partial_paths):
     return paths
 
 
+def serialize_paths(paths):
+    """Get the data of a path request from the paths"""
+    # Use separators with dumps because Netflix rejects spaces
+    return '&'.join('path=' + json.dumps(path, separators=(',', ':')) for path in paths)
+
+
+def compile_range_paths(paths):
+    """
+    Build a template of the paths with the RANGE_PLACEHOLDER, where these paths are serialized once,
+    to be used with render_range_paths
+    :return: a tuple of (the paths without the placeholder, the template of the paths with the placeholder),
+             the template is the serialized data of the paths split at the placeholder
+    """
+    range_paths = [path for path in paths if RANGE_PLACEHOLDER in path]
+    static_paths = [path for path in paths if RANGE_PLACEHOLDER not in path]
+    return static_paths, tuple(serialize_paths(range_paths).split(json.dumps(RANGE_PLACEHOLDER)))
+
+
+def render_range_paths(range_paths_template, range_start, range_end):
+    """
+    Get the serialized data of the paths of a template (see compile_range_paths)
+    by replacing the RANGE_PLACEHOLDER with the range {"from":range_start,"to":range_end}
+    """
+    return f'{{"from":{range_start},"to":{range_end}}}'.join(range_paths_template)
+
+
 def resolve_refs(references, targets):
     """Return a generator expression that returns the objects in targets
     by resolving the references in sorted order"""
@@ -178,29 +178,41 @@ def _update_mylist_cache(videoid, operation, params):
     mylist_identifier = 'mylist'
     if perpetual_range_start and perpetual_range_start != 'None':
         mylist_identifier += f'_{perpetual_range_start}'
+    get_my_list_videoids_call = ('get', {'bucket': cache_utils.CACHE_MYLIST, 'identifier': 'my_list_items'},
+                                 common.IPC_ENDPOINT_CACHE)
     if operation == 'remove':
-        try:
-            video_list_sorted_data = G.CACHE.get(cache_utils.CACHE_MYLIST, mylist_identifier)
+        # Get both cache items with a single IPC request
+        video_list_sorted_data, my_list_videoids = common.make_calls(
+            [('get', {'bucket': cache_utils.CACHE_MYLIST, 'identifier': mylist_identifier},
+              common.IPC_ENDPOINT_CACHE),
+             get_my_list_videoids_call],
+            return_exceptions=True)
+        _raise_if_not_cache_miss(video_list_sorted_data, my_list_videoids)
+        if not isinstance(video_list_sorted_data, CacheMiss):
             del video_list_sorted_data.videos[videoid.value]
             G.CACHE.add(cache_utils.CACHE_MYLIST, mylist_identifier, video_list_sorted_data)
-        except CacheMiss:
-            pass
-        try:
-            my_list_videoids = G.CACHE.get(cache_utils.CACHE_MYLIST, 'my_list_items')
+        if not isinstance(my_list_videoids, CacheMiss):
             my_list_videoids.remove(videoid)
             G.CACHE.add(cache_utils.CACHE_MYLIST, 'my_list_items', my_list_videoids)
-        except CacheMiss:
-            pass
     else:
-        common.make_call('add_videoids_to_video_list_cache', {'cache_bucket': cache_utils.CACHE_MYLIST,
-                                                              'cache_identifier': mylist_identifier,
-                                                              'video_ids': [videoid.value]})
-        try:
-            my_list_videoids = G.CACHE.get(cache_utils.CACHE_MYLIST, 'my_list_items')
+        # Update the video list and get the my list items with a single IPC request
+        add_result, my_list_videoids = common.make_calls(
+            [('add_videoids_to_video_list_cache', {'cache_bucket': cache_utils.CACHE_MYLIST,
+                                                   'cache_identifier': mylist_identifier,
+                                                   'video_ids': [videoid.value]}),
+             get_my_list_videoids_call],
+            return_exceptions=True)
+        _raise_if_not_cache_miss(add_result, my_list_videoids)
+        if not isinstance(my_list_videoids, CacheMiss):
             my_list_videoids.append(videoid)
             G.CACHE.add(cache_utils.CACHE_MYLIST, 'my_list_items', my_list_videoids)
-        except CacheMiss:
-            pass
+
+
+def _raise_if_not_cache_miss(*results):
+    """Raise the first exception of the IPC calls results, except CacheMiss"""
+    for result in results:
+        if isinstance(result, Exception) and not isinstance(result, CacheMiss):
+            raise result
 
 
 @measure_exec_time_decorator()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2020 Stefano Gottardo (original implementation module)
+    Measure the per-operation latency of the cache database (nf_cache.sqlite3), by comparing a connection
+    opened and closed for each operation in rollback journal mode with a connection kept open by each thread
+    in WAL journal mode, also with concurrent readers while a thread writes
+
+    Usage: benchmark_cache_db_connections.py [number of operations] [number of reader threads]
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+VALUE = os.urandom(20000)  # Size similar to a compressed video list of the metadata bucket
+
+
+class ReopenConnection:
+    """The previous implementation, a connection opened and closed for each operation, rollback journal"""
+    name = 'reopen, rollback journal'
+    journal_mode = 'DELETE'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def execute(self, query, params):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+
+class ThreadConnection:
+    """A connection kept open by each thread, WAL journal, as done by CacheManagement"""
+    name = 'per-thread, WAL journal'
+    journal_mode = 'WAL'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local_storage = threading.local()
+
+    def execute(self, query, params):
+        conn = getattr(self.local_storage, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('PRAGMA cache_size = -4096')
+            self.local_storage.conn = conn
+        return conn.execute(query, params).fetchall()
+
+
+def create_db(db_path, journal_mode, rows):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute(f'PRAGMA journal_mode = {journal_mode}')
+    conn.execute('CREATE TABLE cache_data (bucket TEXT NOT NULL, identifier TEXT NOT NULL, value BLOB, '
+                 'expires INT, PRIMARY KEY (bucket, identifier))')
+    conn.executemany('INSERT INTO cache_data VALUES (?, ?, ?, ?)',
+                     [('metadata', f'video_{index}', VALUE, 0) for index in range(rows)])
+    conn.close()
+
+
+def db_add(db, index):
+    db.execute('INSERT OR REPLACE INTO cache_data VALUES (?, ?, ?, ?)', ('metadata', f'new_{index}', VALUE, 0))
+
+
+def db_get(db, index):
+    assert db.execute('SELECT value FROM cache_data WHERE bucket = ? AND identifier = ?',
+                      ('metadata', f'video_{index}'))
+
+
+def db_miss(db, index):
+    db.execute('SELECT value FROM cache_data WHERE bucket = ? AND identifier = ?', ('metadata', f'miss_{index}'))
+
+
+def measure_operation(db, func, operations):
+    start_time = perf_counter()
+    for index in range(operations):
+        func(db, index)
+    return (perf_counter() - start_time) / operations * 1000000
+
+
+def measure_concurrent_reads(db, operations, readers):
+    """Measure the latency of the reads done by more threads, while another thread writes"""
+    latencies = []
+    mutex = threading.Lock()
+    stop_event = threading.Event()
+
+    def reader():
+        thread_latencies = []
+        for index in range(operations):
+            start_time = perf_counter()
+            db_get(db, index)
+            thread_latencies.append(perf_counter() - start_time)
+        with mutex:
+            latencies.extend(thread_latencies)
+
+    def writer():
+        index = 0
+        while not stop_event.is_set():
+            db_add(db, index)
+            index += 1
+
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in reader_threads:
+        thread.start()
+    for thread in reader_threads:
+        thread.join()
+    stop_event.set()
+    writer_thread.join()
+    latencies.sort()
+    return (sum(latencies) / len(latencies) * 1000000,
+            latencies[int(len(latencies) * 0.95)] * 1000000)
+
+
+def main(operations, readers):
+    print(f'Operations: {operations}, concurrent readers: {readers} (+1 writer), latency in µs per operation')
+    print(f'{"":<26} {"add":>8} {"get":>8} {"miss":>8} {"concurrent get":>15} {"p95":>8}')
+    for db_class in [ReopenConnection, ThreadConnection]:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            db_path = os.path.join(temp_dir, 'nf_cache.sqlite3')
+            create_db(db_path, db_class.journal_mode, operations)
+            db = db_class(db_path)
+            add_time = measure_operation(db, db_add, operations)
+            get_time = measure_operation(db, db_get, operations)
+            miss_time = measure_operation(db, db_miss, operations)
+            concurrent_time, concurrent_p95 = measure_concurrent_reads(db, operations, readers)
+            print(f'{db_class.name:<26} {add_time:8.1f} {get_time:8.1f} {miss_time:8.1f} '
+                  f'{concurrent_time:15.1f} {concurrent_p95:8.1f}')
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2021 Stefano Gottardo - @CastagnaIT (original implementation module)
+    Measure the IPC serialisation of a video listing, by comparing the pickle of the directory items
+    (the list of (url, ListItemW, is_folder) tuples) with two candidate compact column-oriented encodings:
+    - columns: the keys of the infolabels, art and properties dicts stored once in a table shared by all items
+    - columns + interned: also the repeated strings interned, the videoid replaced by a placeholder in the urls
+      and context menu actions, the art urls split in the (interned) folder and the file name
+    The Kodistubs ListItem is used, so the cost of the setters of Kodi, the same for all the methods, is left out
+
+    Usage: benchmark_directory_items.py [number of items] [number of iterations]
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import os
+import pickle
+import random
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from resources.lib.globals import G
+from resources.lib.common.kodi_wrappers import ListItemW
+
+ART_URL_FOLDER = 'https://occ-0-2705-2706.1.nflxso.net/dnm/api/v6/6gmvu2hxdfnQ55LZZjyzYR4kzGk/'
+CONTEXT_MENU_ACTIONS = [('Add to My List', 'my_list/add'), ('View trailers', 'trailer'),
+                        ('Rate with thumb', 'rate_thumb'), ('Export to library', 'export'),
+                        ('Change watched status', 'change_watched_status')]
+GENRES = ['Drama', 'Thriller', 'Comedy', 'Action', 'Crime', 'Sci-Fi', 'Horror', 'Romance', 'Documentary']
+TAGS = ['Exciting', 'Dark', 'Suspenseful', 'Witty', 'Emotional', 'Violent', 'Feel-good']
+MPAA = ['TV-MA', 'TV-14', 'PG-13', 'R', 'TV-PG']
+VIDEOID_PLACEHOLDER = '\x00'
+
+
+class ColumnsDirectoryItems:
+    """Pickle the directory items in the column-oriented form"""
+    intern_strings = False
+
+    def __init__(self, directory_items):
+        self.directory_items = directory_items
+
+    def __reduce__(self):  # Pickle method
+        return unpack_directory_items, (pack_directory_items(self.directory_items, self.intern_strings),)
+
+
+class InternedColumnsDirectoryItems(ColumnsDirectoryItems):
+    """Pickle the directory items in the column-oriented form, with the repeated strings interned"""
+    intern_strings = True
+
+
+def pack_directory_items(directory_items, intern_strings):
+    """Convert a list of directory items to the column-oriented form"""
+    strings = {}
+    keys_table = {}
+    columns = ([], [], [], [], [], [], [])
+
+    def intern(value):
+        if intern_strings and isinstance(value, str):
+            return strings.setdefault(value, value)
+        if intern_strings and isinstance(value, list):
+            return [strings.setdefault(item, item) if isinstance(item, str) else item for item in value]
+        return value
+
+    def intern_template(value, videoid):
+        if not intern_strings:
+            return value
+        template = value.replace(videoid, VIDEOID_PLACEHOLDER)
+        return strings.setdefault(template, template)
+
+    def split_art_url(url):
+        index = url.rfind('/') + 1 if intern_strings and isinstance(url, str) else 0
+        return (intern(url[:index]), url[index:]) if index else url
+
+    for url, list_item, is_folder in directory_items:
+        state = list_item.__dict__
+        videoid = state['properties']['nf_videoid']
+        keys = (tuple(state['infolabels']), tuple(state['art']), tuple(state['properties']))
+        for column, value in zip(columns, (
+                intern_template(url, videoid),
+                is_folder,
+                (intern(list_item.getLabel()), intern(list_item.getLabel2()), intern(list_item.getPath())),
+                (keys_table.setdefault(keys, len(keys_table)),
+                 tuple(intern(value) for value in state['infolabels'].values()),
+                 tuple(split_art_url(value) for value in state['art'].values()),
+                 tuple(strings.setdefault(value, value) for value in state['properties'].values())),
+                state['stream_info'],
+                tuple((strings.setdefault(label, label), intern_template(action, videoid))
+                      for label, action in state.get('context_menus', [])),
+                state.get('is_selected'))):
+            column.append(value)
+    return tuple(keys_table), columns
+
+
+def unpack_directory_items(packed_data):
+    """Convert the column-oriented form to a list of directory items"""
+    keys_table, columns = packed_data
+    directory_items = []
+    for url, is_folder, labels, dicts_data, stream_info, context_menus, is_selected in zip(*columns):
+        infolabels_keys, art_keys, properties_keys = keys_table[dicts_data[0]]
+        properties = dict(zip(properties_keys, dicts_data[3]))
+        videoid = properties['nf_videoid']
+        # Create the object as done by pickle, see ListItemW.__getnewargs__
+        list_item = ListItemW.__new__(ListItemW, *labels, True)
+        state = {
+            'infolabels': dict(zip(infolabels_keys, dicts_data[1])),
+            'art': {key: value[0] + value[1] if isinstance(value, tuple) else value
+                    for key, value in zip(art_keys, dicts_data[2])},
+            'properties': properties,
+            'stream_info': stream_info,
+            'context_menus': [(label, action.replace(VIDEOID_PLACEHOLDER, videoid))
+                              for label, action in context_menus]
+        }
+        if is_selected is not None:
+            state['is_selected'] = is_selected
+        list_item.__setstate__(state)
+        directory_items.append((url.replace(VIDEOID_PLACEHOLDER, videoid), list_item, is_folder))
+    return directory_items
+
+
+def new_str(value):
+    """Get a copy of a string, as happens when the data of each video is deserialized from the cache"""
+    return ''.join(list(value))
+
+
+def random_text(rnd, length):
+    return ''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz     ') for _ in range(length))
+
+
+def make_directory_items(items_count):
+    """Create the directory items of a video listing, as done by build_video_listing"""
+    rnd = random.Random(0)
+    cast_names = [random_text(rnd, 14).title() for _ in range(300)]
+    directory_items = []
+    for index in range(items_count):
+        videoid = f'movie/{80000000 + index}'
+        list_item = ListItemW(label=f'Title of the video {index}')
+        list_item.setProperties({
+            'isPlayable': 'true',
+            'nf_videoid': videoid,
+            'nf_is_in_mylist': 'False',
+            'nf_perpetual_range_start': 'None'
+        })
+        list_item.addContextMenuItems([
+            (new_str(label), f'RunPlugin(plugin://plugin.video.netflix/action/{action}/{videoid}/'
+                             f'?trackid=254015180, False)')
+            for label, action in CONTEXT_MENU_ACTIONS])
+        list_item.setInfo('video', {
+            'Title': f'Title of the video {index}',
+            'Year': 2000 + index % 20,
+            'Plot': random_text(rnd, 250),
+            'PlotOutline': random_text(rnd, 250),
+            'Rating': rnd.randint(50, 99) / 10,
+            'Mpaa': new_str(rnd.choice(MPAA)),
+            'Duration': rnd.randint(4000, 8000),
+            'Genre': [new_str(genre) for genre in rnd.sample(GENRES, 2)],
+            'Director': [new_str(rnd.choice(cast_names))],
+            'Writer': [new_str(rnd.choice(cast_names))],
+            'Cast': [new_str(name) for name in rnd.sample(cast_names, 5)],
+            'Tag': [new_str(tag) for tag in rnd.sample(TAGS, 3)],
+            'MediaType': new_str('movie'),
+            'PlayCount': 0
+        })
+        art_files = {key: f'AAAAB{random_text(rnd, 60).replace(" ", "x")}.jpg?r=2a4'
+                     for key in ['poster', 'fanart', 'thumb', 'clearlogo']}
+        list_item.setArt({
+            'poster': ART_URL_FOLDER + art_files['poster'],
+            'fanart': ART_URL_FOLDER + art_files['fanart'],
+            'thumb': ART_URL_FOLDER + art_files['thumb'],
+            'landscape': ART_URL_FOLDER + art_files['thumb'],
+            'clearlogo': ART_URL_FOLDER + art_files['clearlogo']
+        })
+        list_item.addStreamInfoFromDict({'video': {'codec': 'h264', 'width': 1920, 'height': 1080},
+                                         'audio': {'codec': 'eac3', 'channels': 6}})
+        directory_items.append((f'plugin://plugin.video.netflix/play/{videoid}/?trackid=254015180',
+                                list_item, False))
+    return directory_items
+
+
+def measure(name, directory_items, iterations):
+    """Measure the time of the serialisation (service) and of the deserialisation (add-on frontend)"""
+    G.IS_SERVICE = True
+    start_time = perf_counter()
+    for _ in range(iterations):
+        data = pickle.dumps(directory_items, protocol=pickle.HIGHEST_PROTOCOL)
+    dumps_time = (perf_counter() - start_time) / iterations * 1000
+    G.IS_SERVICE = False
+    start_time = perf_counter()
+    for _ in range(iterations):
+        pickle.loads(data)
+    loads_time = (perf_counter() - start_time) / iterations * 1000
+    print(f'{name:<20} size: {len(data) / 1024:7.1f} KiB, dumps (service): {dumps_time:6.2f} ms, '
+          f'loads (frontend): {loads_time:6.2f} ms')
+    return data
+
+
+def main(items_count, iterations):
+    G.IS_SERVICE = True
+    G.IS_OLD_KODI_MODULES = True
+    directory_items = make_directory_items(items_count)
+    print(f'Video listing of {items_count} items, iterations: {iterations}')
+    # To check that the directory items are restored as they were, the state is kept in the objects
+    list_item_setstate = ListItemW.__setstate__
+    ListItemW.__setstate__ = lambda self, state: self.__dict__.update(state)
+    expected_items = [(url, list_item.__dict__, is_folder)
+                      for url, list_item, is_folder in pickle.loads(pickle.dumps(directory_items))]
+    for items_class in [ColumnsDirectoryItems, InternedColumnsDirectoryItems]:
+        restored_items = pickle.loads(pickle.dumps(items_class(directory_items)))
+        assert [(url, list_item.__dict__, is_folder) for url, list_item, is_folder in restored_items] == expected_items
+    ListItemW.__setstate__ = list_item_setstate
+    measure('pickle', directory_items, iterations)
+    measure('columns', ColumnsDirectoryItems(directory_items), iterations)
+    measure('columns + interned', InternedColumnsDirectoryItems(directory_items), iterations)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 300)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2020 Stefano Gottardo (original implementation module)
+    Measure the latency of a memory-cache hit of a large video list, by comparing the serialized data
+    deserialized on each access with the object kept as it is (LIVE_OBJECT_BUCKET_NAMES)
+
+    Usage: benchmark_live_object_cache.py [number of videos] [number of iterations]
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import os
+import sys
+from collections import OrderedDict
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from resources.lib.common import cache_utils
+from resources.lib.utils.data_types import CustomVideoList
+
+
+def make_path_response(videos_count):
+    """Create the path response of a video list, with the data of the videos as requested by the add-on"""
+    videos = {}
+    for index in range(videos_count):
+        video_id = str(80000000 + index)
+        videos[video_id] = {
+            'summary': {'value': {'id': int(video_id), 'type': 'show', 'isOriginal': False}},
+            'title': {'value': f'Title of the video {index}'},
+            'synopsis': {'value': 'A synopsis of the video. ' * 12},
+            'regularSynopsis': {'value': 'A regular synopsis of the video. ' * 12},
+            'releaseYear': {'value': 2000 + index % 20},
+            'maturity': {'value': {'rating': {'value': 'TV-MA', 'maturityLevel': 110}}},
+            'cast': {str(num): {'$type': 'ref', 'value': ['person', str(index * 10 + num)]} for num in range(10)},
+            'genres': {str(num): {'$type': 'ref', 'value': ['genres', str(num)]} for num in range(3)},
+            'boxarts': {'_342x192': {'jpg': {'url': 'https://occ-0-2705-2706.1.nflxso.net/dnm/api/v6/'
+                                                    f'6gmvu2hxdfnQ55LZZjyzYR4kzGk/AAAAB{video_id * 8}.jpg'}}},
+            'availability': {'value': {'isPlayable': True, 'availabilityDate': 'January 1'}},
+            'userRating': {'value': {'matchScore': 90, 'userRating': 0}},
+            'queue': {'value': {'available': True, 'inQueue': False}},
+            'watched': {'value': False},
+            'bookmarkPosition': {'value': -1}
+        }
+    return {'videos': videos,
+            'person': {str(num): {'name': {'value': f'Actor {num}'}} for num in range(videos_count * 10)},
+            'genres': {str(num): {'name': {'value': f'Genre {num}'}} for num in range(3)}}
+
+
+def measure(name, func, iterations):
+    start_time = perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = (perf_counter() - start_time) / iterations * 1000000
+    print(f'{name:<40} {elapsed:10.1f} µs per hit')
+    return elapsed
+
+
+def main(videos_count, iterations):
+    video_list = CustomVideoList(make_path_response(videos_count))
+    data = cache_utils.serialize_data(video_list)
+    print(f'Video list of {videos_count} videos ({len(data) / 1024:.0f} KiB serialized), iterations: {iterations}')
+    # A memory-cache bucket, where the entries are moved to the end on each access (least recently used order)
+    memory_cache = OrderedDict((f'list_{index}', None) for index in range(100))
+    memory_cache['video_list'] = {'expires': 0, 'data': data, 'size': len(data)}
+    memory_cache['video_list_live'] = {'expires': 0, 'data': video_list, 'size': len(data)}
+
+    def get_serialized():
+        memory_cache.move_to_end('video_list')
+        return cache_utils.deserialize_data(memory_cache['video_list']['data'])
+
+    def get_live_object():
+        memory_cache.move_to_end('video_list_live')
+        return memory_cache['video_list_live']['data']
+
+    assert get_serialized().videos.keys() == get_live_object().videos.keys()
+    serialized_time = measure('serialized data (deserialize on hit)', get_serialized, iterations)
+    live_object_time = measure('live object', get_live_object, iterations)
+    print(f'Live object hit is {serialized_time / live_object_time:.0f}x faster')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 100)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2020 Stefano Gottardo (original implementation module)
+    Measure the time to get the data of each range of a perpetual path request,
+    by comparing the deepcopy and the serialization of the whole paths with the preserialized paths template
+
+    Usage: benchmark_range_selector.py [number of iterations]
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import os
+import sys
+from copy import deepcopy
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from resources.lib.utils.api_paths import (RANGE_PLACEHOLDER, VIDEO_LIST_PARTIAL_PATHS, PATH_REQUEST_SIZE_PAGINATED,
+                                           build_paths, compile_range_paths, render_range_paths, serialize_paths)
+
+
+def set_range_selector_deepcopy(paths, range_start, range_end):
+    """The previous implementation, make a deepcopy of the paths and then replace the RANGE_PLACEHOLDER"""
+    ranged_paths = deepcopy(paths)
+    for path in ranged_paths:
+        try:
+            path[path.index(RANGE_PLACEHOLDER)] = {'from': range_start, 'to': range_end}
+        except ValueError:
+            pass
+    return ranged_paths
+
+
+def measure(name, func, iterations):
+    start_time = perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = (perf_counter() - start_time) / iterations * 1000000
+    print(f'{name:<40} {elapsed:10.1f} µs per page')
+    return elapsed
+
+
+def main(iterations):
+    # Paths of a video list page as done by req_videos_list_sorted (full art and infolabels paths)
+    paths = (build_paths(['mylist', 'az', RANGE_PLACEHOLDER, 'reference'], VIDEO_LIST_PARTIAL_PATHS) +
+             [['mylist', ['id', 'name', 'requestId', 'trackIds']]])
+    range_end = PATH_REQUEST_SIZE_PAGINATED  # A typical page of 45 items
+    static_paths, range_paths_template = compile_range_paths(paths)
+    # The paths with the range selector are placed after the other paths
+    expected_paths = sorted(set_range_selector_deepcopy(paths, 0, range_end), key=lambda path: path not in paths)
+    assert (serialize_paths(static_paths) + '&' + render_range_paths(range_paths_template, 0, range_end) ==
+            serialize_paths(expected_paths))
+    print(f'Paths: {len(paths)}, page of {range_end + 1} items, iterations: {iterations}')
+    deepcopy_time = measure('deepcopy + serialization',
+                            lambda: serialize_paths(set_range_selector_deepcopy(paths, 0, range_end)), iterations)
+    template_time = measure('template (with compile)',
+                            lambda: render_range_paths(compile_range_paths(paths)[1], 0, range_end), iterations)
+    render_time = measure('template (render only)', lambda: render_range_paths(range_paths_template, 0, range_end),
+                          iterations)
+    print(f'Speedup: {deepcopy_time / template_time:.1f}x (with compile), {deepcopy_time / render_time:.1f}x '
+          f'(render only)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2020 Stefano Gottardo (original implementation module)
+    Measure the size and the time of the compression methods on the data of a cache database (nf_cache.sqlite3)
+
+    Usage: measure_cache_compression.py <path of nf_cache.sqlite3> [max rows per bucket]
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+import lzma
+import sqlite3
+import sys
+import zlib
+from time import perf_counter
+
+METHODS = [
+    ('zlib 1', lambda value: zlib.compress(value, 1), zlib.decompress),
+    ('zlib 6', lambda value: zlib.compress(value, 6), zlib.decompress),
+    ('zlib 9', lambda value: zlib.compress(value, 9), zlib.decompress),
+    ('lzma 0', lambda value: lzma.compress(value, preset=0), lzma.decompress),
+    ('lzma 6', lambda value: lzma.compress(value, preset=6), lzma.decompress),
+]
+DECOMPRESS = {0: lambda value: value, 1: zlib.decompress, 2: lzma.decompress}
+
+
+def load_rows(db_path, max_rows):
+    """Load the uncompressed values of the rows, by bucket"""
+    conn = sqlite3.connect(db_path)
+    columns = [column_info[1] for column_info in conn.execute('PRAGMA table_info(cache_data)')]
+    if 'content_hash' in columns:
+        # Each content is measured once, also when it is referred by more profiles
+        query = ('SELECT bucket, value, compression FROM '
+                 '(SELECT (SELECT bucket FROM cache_data WHERE content_hash = hash LIMIT 1) AS bucket, '
+                 'value, compression FROM cache_content '
+                 'UNION ALL SELECT bucket, value, compression FROM cache_data WHERE content_hash IS NULL) '
+                 'WHERE bucket IS NOT NULL ORDER BY bucket')
+    else:
+        compression_column = 'compression' if 'compression' in columns else '0'
+        query = f'SELECT bucket, value, {compression_column} FROM cache_data ORDER BY bucket'
+    buckets = {}
+    for bucket, value, compression in conn.execute(query):
+        values = buckets.setdefault(bucket, [])
+        if len(values) < max_rows:
+            values.append(DECOMPRESS[compression](value))
+    conn.close()
+    return buckets
+
+
+def measure(values, compress_func, decompress_func):
+    """Return the total compressed size and the average compression/decompression time in ms"""
+    start = perf_counter()
+    compressed_values = [compress_func(value) for value in values]
+    compress_time = perf_counter() - start
+    start = perf_counter()
+    for value in compressed_values:
+        decompress_func(value)
+    decompress_time = perf_counter() - start
+    return (sum(len(value) for value in compressed_values),
+            compress_time * 1000 / len(values),
+            decompress_time * 1000 / len(values))
+
+
+def main():
+    db_path = sys.argv[1]
+    max_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    for bucket, values in load_rows(db_path, max_rows).items():
+        raw_size = sum(len(value) for value in values)
+        print(f'{bucket}: {len(values)} rows, {raw_size / 1024:.1f} KiB uncompressed')
+        print(f'  {"method":<8} {"size KiB":>10} {"ratio":>7} {"compress ms":>12} {"decompress ms":>14}')
+        for name, compress_func, decompress_func in METHODS:
+            size, compress_ms, decompress_ms = measure(values, compress_func, decompress_func)
+            print(f'  {name:<8} {size / 1024:>10.1f} {size / raw_size:>7.2f} '
+                  f'{compress_ms:>12.3f} {decompress_ms:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
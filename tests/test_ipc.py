@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+    Copyright (C) 2017 Sebastian Golasch (plugin.video.netflix)
+    Copyright (C) 2018 Caphm (original implementation module)
+    Tests of the IPC over HTTP client
+
+    SPDX-License-Identifier: MIT
+    See LICENSES/MIT.md for more information.
+"""
+# pylint: disable=missing-docstring,wrong-import-position
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+# The AddonSignals module is provided by the stub of the tests folder
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from resources.lib.common import ipc
+from resources.lib.common.exceptions import BackendNotReady
+
+
+class SlotRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.calls += 1
+        if self.path == '/slow':
+            # The client is already gone when the slot ends
+            time.sleep(self.server.slow_duration)
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TestIPCHttpClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), SlotRequestHandler)
+        self.server.calls = 0
+        self.server.slow_duration = 1.5
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ipc.IPCHttpClient()
+        self.client._port = self.server.server_address[1]  # pylint: disable=protected-access
+        patchers = [mock.patch.object(ipc, 'IPC_TIMEOUT_SECS', 0.5),
+                    mock.patch.object(ipc, 'get_ipc_socket_path', return_value=None)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_slow_slot_executed_once(self):
+        """A request that timed out must not be sent again, the service could have executed it"""
+        start_time = time.perf_counter()
+        with self.assertRaises(BackendNotReady):
+            self.client.post('/slow', b'data')
+        self.assertLess(time.perf_counter() - start_time, 1)
+        # Wait the end of the slot execution in the service
+        time.sleep(self.server.slow_duration)
+        self.assertEqual(self.server.calls, 1)
+
+    def test_keep_alive_connection_reused(self):
+        self.assertEqual(self.client.post('/fast', b'data'), b'ok')
+        self.assertEqual(self.client.post('/fast', b'data'), b'ok')
+        self.assertEqual(self.server.calls, 2)
+
+    def test_closed_keep_alive_connection_retried(self):
+        """A keep-alive connection closed by the service is reopened, and the request is sent once"""
+        self.assertEqual(self.client.post('/fast', b'data'), b'ok')
+        with mock.patch.object(self.client, '_request',
+                               side_effect=[ConnectionResetError(), b'ok']) as request_mock:
+            self.assertEqual(self.client.post('/fast', b'data'), b'ok')
+        self.assertEqual(request_mock.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()